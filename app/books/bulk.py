@@ -0,0 +1,89 @@
+import json
+from collections.abc import AsyncIterator
+from http import HTTPStatus
+from typing import Any
+
+from pydantic import ValidationError
+
+from app.core.exceptions import AppException, BadRequestException
+
+from .model import BookCreate, BulkItemResult
+
+NDJSON_CONTENT_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl"}
+
+
+async def _ndjson_items(chunks: AsyncIterator[bytes]) -> AsyncIterator[Any]:
+    # Lê linha a linha conforme o corpo chega; linha inválida vira erro do item
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield _loads(line)
+    if buffer.strip():
+        yield _loads(buffer)
+
+
+def _loads(line: bytes) -> Any:
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError as err:
+        return err
+
+
+async def _json_items(chunks: AsyncIterator[bytes]) -> AsyncIterator[Any]:
+    body = b"".join([chunk async for chunk in chunks])
+    try:
+        items = json.loads(body)
+    except json.JSONDecodeError as err:
+        raise BadRequestException("Request body is not valid JSON") from err
+
+    if not isinstance(items, list):
+        raise BadRequestException("Request body must be a JSON array of books")
+
+    for item in items:
+        yield item
+
+
+async def parse_bulk_books(
+    chunks: AsyncIterator[bytes], content_type: str, *, max_items: int
+) -> tuple[list[tuple[int, BookCreate]], list[BulkItemResult]]:
+    """
+    Valida cada item de um array JSON ou de um corpo NDJSON como BookCreate.
+
+    Devolve os livros válidos com a posição original e o resultado de erro dos
+    inválidos; um item ruim não invalida o lote.
+    """
+    media_type = content_type.split(";")[0].strip().lower()
+    source = _ndjson_items if media_type in NDJSON_CONTENT_TYPES else _json_items
+
+    books: list[tuple[int, BookCreate]] = []
+    errors: list[BulkItemResult] = []
+    index = -1
+
+    async for item in source(chunks):
+        index += 1
+        if index >= max_items:
+            raise AppException(
+                f"At most {max_items} books per request",
+                status_code=HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                title="Payload too large",
+            )
+
+        if isinstance(item, json.JSONDecodeError):
+            errors.append(
+                BulkItemResult(index=index, errors=[{"type": "json_invalid", "msg": str(item)}])
+            )
+            continue
+
+        try:
+            books.append((index, BookCreate.model_validate(item)))
+        except ValidationError as err:
+            errors.append(
+                BulkItemResult(
+                    index=index, errors=err.errors(include_url=False, include_context=False)
+                )
+            )
+
+    return books, errors
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import json
+from collections.abc import Sequence
+
+from app.core.config import (
+    BOOK_CACHE_BACKEND,
+    BOOK_CACHE_PATH,
+    BOOK_CACHE_SIZE,
+    BOOK_CACHE_TTL_SECONDS,
+)
+from app.core.read_cache import ReadCache, create_read_cache
+from app.core.singleflight import SingleFlight
+
+from .model import READ_FIELDS, BookFilters
+
+# Páginas e livros já serializados, por usuário. Toda escrita do BookService
+# invalida as entradas do usuário que escreveu.
+book_read_cache: ReadCache = create_read_cache(
+    BOOK_CACHE_BACKEND,
+    maxsize=BOOK_CACHE_SIZE,
+    ttl=BOOK_CACHE_TTL_SECONDS,
+    path=BOOK_CACHE_PATH,
+)
+
+# Leituras idênticas e simultâneas do mesmo usuário dividem uma só ida ao banco
+book_reads = SingleFlight()
+
+
+def page_key(
+    *,
+    filters: BookFilters,
+    page: int,
+    size: int,
+    include_total: bool,
+    fields: Sequence[str] = READ_FIELDS,
+    library_version: int | None = None,
+) -> str:
+    # Padrões preenchidos e chaves ordenadas; ilike e FTS5 ignoram caixa em
+    # ASCII, então "Martin" e "martin" são a mesma página. A versão da
+    # biblioteca (a do ETag) entra na chave: a escrita de outro worker não
+    # invalida este cache, mas muda a versão e a página vira um miss
+    normalized = filters.model_dump(mode="json")
+    for name in ("author", "title"):
+        value = normalized[name]
+        if value is not None and value.isascii():
+            normalized[name] = value.lower()
+
+    return json.dumps(
+        ["page", normalized, page, size, include_total, list(fields), library_version],
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+
+
+def book_key(book_id: int, fields: Sequence[str] = READ_FIELDS) -> str:
+    # "v2": o valor passou a ser `<version>\n<json>`; entradas antigas no
+    # backend sqlite (compartilhado entre deploys) nunca são lidas com o formato novo
+    if len(fields) == len(READ_FIELDS):
+        return f"book:v2:{book_id}"
+    return f"book:v2:{book_id}:{','.join(fields)}"
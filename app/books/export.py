@@ -0,0 +1,47 @@
+import csv
+import io
+from collections.abc import AsyncIterator, Sequence
+
+from .model import READ_FIELDS
+from .serializers import row_json, row_python
+
+# formato -> media type da resposta
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+async def _ndjson(
+    batches: AsyncIterator[Sequence[Sequence]], fields: Sequence[str]
+) -> AsyncIterator[bytes]:
+    async for batch in batches:
+        yield b"".join(row_json(row, fields) + b"\n" for row in batch)
+
+
+async def _csv(
+    batches: AsyncIterator[Sequence[Sequence]], fields: Sequence[str]
+) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(fields))
+    writer.writeheader()
+
+    async for batch in batches:
+        writer.writerows(row_python(row, fields) for row in batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    # biblioteca vazia: ainda envia o cabeçalho
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def export_chunks(
+    batches: AsyncIterator[Sequence[Sequence]], format: str, fields: Sequence[str] = READ_FIELDS
+) -> AsyncIterator[str | bytes]:
+    """
+    Serializa cada lote do repositório (tuplas com as colunas de `fields`)
+    em um pedaço da resposta, sem juntar a exportação inteira na memória.
+    """
+    return _ndjson(batches, fields) if format == "ndjson" else _csv(batches, fields)
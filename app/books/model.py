@@ -1,12 +1,16 @@
+import base64
 from datetime import date, datetime
 from enum import StrEnum
 from math import ceil
-from typing import Literal
+from typing import Any, Literal, Self, TypedDict
 
-from pydantic import BaseModel
-from sqlalchemy import Column, DateTime, func
+from pydantic import BaseModel, model_validator
+from pydantic import Field as PydanticField
+from sqlalchemy import Column, DateTime, Index, func
 from sqlmodel import Field, SQLModel
 
+from app.core.config import BOOK_BULK_MAX_ITEMS
+
 
 class ReadingStatus(StrEnum):
     TO_READ = "TO_READ"
@@ -22,12 +26,71 @@ class BookBase(SQLModel):
     end_date: date | None = None
 
 
+# Um índice por ordenação suportada em BookFilters, com e sem filtro de status,
+# terminando em id (o desempate da paginação) para o ORDER BY dispensar sort.
+SORT_COLUMNS = ("title", "author", "created_at", "start_date", "end_date")
+
+
 class Book(BookBase, table=True):
+    __table_args__ = (
+        tuple(
+            Index(f"ix_book_user_id_{column}", "user_id", column, "id") for column in SORT_COLUMNS
+        )
+        + tuple(
+            Index(f"ix_book_user_id_status_{column}", "user_id", "status", column, "id")
+            for column in SORT_COLUMNS
+        )
+        + (Index("ix_book_user_id_change_seq", "user_id", "change_seq", "id"),)
+    )
+
+    # Colunas geradas pelo banco (id, created_at) vêm no RETURNING do INSERT,
+    # sem um SELECT de refresh depois do commit
+    __mapper_args__ = {"eager_defaults": True}
+
     id: int | None = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="users.id", nullable=False, index=True)
     created_at: datetime = Field(
         sa_column=Column(DateTime(timezone=True), nullable=False, server_default=func.now())
     )
+    # Base do ETag do detalhe: começa na versão da biblioteca do usuário e é
+    # incrementada a cada UPDATE, então não se repete para um id reaproveitado
+    version: int = Field(default=1, nullable=False, sa_column_kwargs={"server_default": "1"})
+    # Posição da última escrita do livro na sequência de mudanças do usuário
+    # (GET /books/changes); preenchida pelo repositório em cada insert/update
+    change_seq: int = Field(default=0, nullable=False, sa_column_kwargs={"server_default": "0"})
+
+
+class BookTombstone(SQLModel, table=True):
+    """
+    Registro de um livro apagado, para que a sincronização incremental
+    (GET /books/changes) avise os clientes da remoção.
+    """
+
+    __tablename__ = "book_tombstone"
+    __table_args__ = (
+        Index("ix_book_tombstone_user_id_change_seq", "user_id", "change_seq", "book_id"),
+    )
+
+    id: int | None = Field(default=None, primary_key=True)
+    # Sem chave estrangeira: o livro já não existe
+    book_id: int = Field(nullable=False)
+    user_id: int = Field(foreign_key="users.id", nullable=False)
+    change_seq: int = Field(nullable=False)
+    deleted_at: datetime = Field(
+        sa_column=Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    )
+
+
+class LibraryVersion(SQLModel, table=True):
+    """
+    Versão da biblioteca de cada usuário, incrementada por triggers em
+    qualquer insert, update ou delete de `book` (ver `versioning.py`).
+    """
+
+    __tablename__ = "library_version"
+
+    user_id: int = Field(primary_key=True, foreign_key="users.id")
+    version: int = Field(default=0, nullable=False)
 
 
 class BookCreate(BookBase):
@@ -39,6 +102,35 @@ class BookRead(BookBase):
     created_at: datetime
 
 
+# `BookRead` como dicionário simples: o formato das leituras projetadas, que
+# montam a resposta direto das colunas, sem entidades do ORM. Todas as chaves
+# são opcionais porque `fields=` pode pedir só parte delas.
+BookRow = TypedDict(
+    "BookRow",
+    {name: field.annotation for name, field in BookRead.model_fields.items()},
+    total=False,
+)
+
+READ_FIELDS = tuple(BookRead.model_fields)
+
+# `fields=title,status`: nomes de campos de BookRead separados por vírgula
+_FIELD_NAMES = "|".join(READ_FIELDS)
+FIELDS_PATTERN = rf"^({_FIELD_NAMES})(,({_FIELD_NAMES}))*$"
+
+
+def parse_fields(fields: str | None) -> tuple[str, ...]:
+    """
+    Campos pedidos em `fields=` (já validado por `FIELDS_PATTERN`), sem
+    repetição e na ordem de `BookRead`; sem `fields`, todos. A ordem fixa faz
+    `author,title` e `title,author` caírem na mesma entrada de cache.
+    """
+    if not fields:
+        return READ_FIELDS
+
+    requested = set(fields.split(","))
+    return tuple(name for name in READ_FIELDS if name in requested)
+
+
 class BookUpdate(SQLModel):
     title: str | None = None
     author: str | None = None
@@ -47,6 +139,18 @@ class BookUpdate(SQLModel):
     end_date: date | None = None
 
 
+class BulkItemResult(BaseModel):
+    index: int
+    id: int | None = None
+    errors: list[dict[str, Any]] | None = None
+
+
+class BulkCreateResult(BaseModel):
+    created: int
+    failed: int
+    items: list[BulkItemResult]
+
+
 class BookFilters(BaseModel):
     status: ReadingStatus | None = None
     author: str | None = None
@@ -55,20 +159,138 @@ class BookFilters(BaseModel):
     order: Literal["asc", "desc"] = "desc"
 
 
+class BulkSelection(BaseModel):
+    """
+    Livros alvo de uma escrita em lote: uma lista de `ids` ou um seletor
+    `filters` (status/author/title, com ao menos um deles preenchido).
+    """
+
+    ids: list[int] | None = PydanticField(
+        default=None, min_length=1, max_length=BOOK_BULK_MAX_ITEMS
+    )
+    filters: BookFilters | None = None
+
+    @model_validator(mode="after")
+    def check_selection(self) -> Self:
+        if (self.ids is None) == (self.filters is None):
+            raise ValueError("Provide either ids or filters")
+
+        if self.filters and not (self.filters.status or self.filters.author or self.filters.title):
+            raise ValueError("filters must set status, author or title")
+
+        return self
+
+
+class BulkUpdate(BulkSelection):
+    patch: BookUpdate
+
+    @model_validator(mode="after")
+    def check_patch(self) -> Self:
+        if not self.patch.model_fields_set:
+            raise ValueError("patch must set at least one field")
+
+        # Colunas NOT NULL: só as datas aceitam null no patch
+        for name in ("title", "author", "status"):
+            if name in self.patch.model_fields_set and getattr(self.patch, name) is None:
+                raise ValueError(f"patch cannot set {name} to null")
+
+        return self
+
+
+class BulkWriteResult(BaseModel):
+    affected: int
+
+
 class Page[T](BaseModel):
     items: list[T]
-    total: int
+    total: int | None
     page: int
     size: int
-    pages: int
+    pages: int | None
+    has_next: bool
 
     @classmethod
-    def create(cls, *, items: list[T], total: int, page: int, size: int):
-        pages = ceil(total / size) if size else 1
+    def create(
+        cls,
+        *,
+        items: list[T],
+        total: int | None,
+        page: int,
+        size: int,
+        has_next: bool = False,
+    ):
+        # Sem total (include_total=false) só sabemos se existe próxima página
+        pages = None
+        if total is not None:
+            pages = ceil(total / size) if size else 1
+            has_next = page < pages
+
         return cls(
             items=items,
             total=total,
             page=page,
             size=size,
             pages=pages,
+            has_next=has_next,
         )
+
+
+class CursorPage[T](BaseModel):
+    items: list[T]
+    size: int
+    next_cursor: str | None
+
+
+class OpaqueCursor(BaseModel):
+    """Cursor serializado como JSON em base64 url-safe, sem padding."""
+
+    def encode(self) -> str:
+        raw = self.model_dump_json().encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    @classmethod
+    def decode(cls, cursor: str) -> Self:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        try:
+            return cls.model_validate_json(base64.urlsafe_b64decode(padded))
+        except ValueError as err:
+            raise ValueError("Invalid cursor") from err
+
+
+class BookCursor(OpaqueCursor):
+    """
+    Posição da última linha entregue numa página por cursor.
+
+    `value` guarda o valor bruto da coluna de ordenação como está no SQLite,
+    para que a comparação do keyset seja a mesma usada pelo ORDER BY.
+    """
+
+    order_by: str
+    order: Literal["asc", "desc"]
+    value: str | None
+    id: int
+
+
+class ChangeCursor(OpaqueCursor):
+    """Última mudança entregue por GET /books/changes: (change_seq, id do livro)."""
+
+    seq: int = 0
+    id: int = 0
+
+
+class BookDeletion(BaseModel):
+    id: int
+    deleted_at: datetime
+
+
+class BookChanges(BaseModel):
+    """
+    Mudanças depois de um cursor. O cliente aplica `deleted` antes de `books`
+    (um id apagado pode ter sido reaproveitado por um livro novo) e guarda
+    `next_cursor` para a próxima chamada.
+    """
+
+    books: list[BookRead]
+    deleted: list[BookDeletion]
+    next_cursor: str
+    has_more: bool
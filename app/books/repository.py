@@ -1,80 +1,565 @@
-from sqlmodel import Session, func, select
+from collections.abc import AsyncIterator, Sequence
+from functools import partial
+from typing import Any
 
-from .model import Book, BookFilters
+from sqlalchemy import Row, String, and_, delete, insert, or_, type_coerce, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.config import (
+    BOOK_COUNT_CACHE_SIZE,
+    BOOK_COUNT_CACHE_TTL_SECONDS,
+    BOOK_WRITE_COALESCING,
+    BOOK_WRITE_MAX_BATCH,
+    BOOK_WRITE_WINDOW_MS,
+)
+from app.core.database import dedicated_write_engine
+from app.core.write_coalescer import WriteCoalescer
+
+from .model import (
+    READ_FIELDS,
+    Book,
+    BookCreate,
+    BookCursor,
+    BookFilters,
+    BookTombstone,
+    BulkSelection,
+    ChangeCursor,
+    LibraryVersion,
+)
+from .search import book_fts, search_index
+
+
+def read_columns(fields: Sequence[str] = READ_FIELDS) -> list:
+    """
+    Colunas dos campos de `BookRead` pedidos, na mesma ordem. As leituras
+    projetadas devolvem tuplas nesse formato: sem entidades, identity map nem
+    rastreio de mudanças.
+    """
+    return [getattr(Book, name) for name in fields]
+
+
+ORDER_FIELDS = {
+    "title": Book.title,
+    "author": Book.author,
+    "created_at": Book.created_at,
+    "start_date": Book.start_date,
+    "end_date": Book.end_date,
+}
+
+
+class BookCountCache:
+    """
+    Total de livros por usuário para a listagem sem filtros.
+
+    O valor vive na memória do processo, limitado em itens e TTL, guardado
+    junto com a versão da biblioteca do usuário (`library_version`) lida antes
+    da contagem. Os triggers do SQLite incrementam essa versão em toda escrita
+    em `book`, venha de qualquer worker; com outra versão, o total é um miss e
+    a contagem roda de novo.
+    """
+
+    def __init__(self, *, maxsize: int, ttl: float):
+        self._totals = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, user_id: int, version: int) -> int | None:
+        entry = self._totals.get(user_id)
+        if entry is None or entry[0] != version:
+            return None
+        return entry[1]
+
+    def store(self, user_id: int, total: int, version: int) -> None:
+        self._totals.set(user_id, (version, total))
+
+    def clear(self) -> None:
+        self._totals.clear()
+
+
+book_counts = BookCountCache(maxsize=BOOK_COUNT_CACHE_SIZE, ttl=BOOK_COUNT_CACHE_TTL_SECONDS)
+
+
+def _next_library_version(user_id: int):
+    """
+    Versão que a biblioteca do usuário terá depois da próxima escrita,
+    avaliada no próprio comando. Os triggers de `versioning.py` a incrementam
+    a cada escrita; o SQLite serializa escritores, e nenhuma transação grava
+    um valor menor que o de outra já confirmada.
+
+    É o `change_seq` de cada escrita (GET /books/changes) e a versão inicial
+    de um livro novo: cada UPDATE soma um à versão do livro e também
+    incrementa a da biblioteca, então a versão de um livro nunca passa da
+    versão da biblioteca, e um id reaproveitado depois de um delete recomeça
+    acima de qualquer versão do livro apagado.
+    """
+    return (
+        select(func.coalesce(func.max(LibraryVersion.version), 0) + 1)
+        .where(LibraryVersion.user_id == user_id)
+        .scalar_subquery()
+    )
+
+
+# Desligado por padrão: cada create/update faz o próprio commit
+book_writes = (
+    WriteCoalescer(
+        partial(AsyncSession, dedicated_write_engine(), expire_on_commit=False),
+        window=BOOK_WRITE_WINDOW_MS / 1000,
+        max_batch=BOOK_WRITE_MAX_BATCH,
+    )
+    if BOOK_WRITE_COALESCING
+    else None
+)
+
+
+def _after_change(seq_column, id_column, after: ChangeCursor):
+    return or_(
+        seq_column > after.seq,
+        and_(seq_column == after.seq, id_column > after.id),
+    )
 
 
 class BookRepository:
-    def create(self, session: Session, book: Book) -> Book:
-        session.add(book)
-        session.commit()
-        session.refresh(book)
+    def __init__(self, writes: WriteCoalescer | None = None):
+        # Com um coalescer, create/update entram num lote com commit único e
+        # não usam a sessão recebida
+        self.writes = writes
+
+    async def create(self, session: AsyncSession, book: Book) -> Book:
+        if self.writes is not None:
+            book = await self.writes.submit(lambda batch: self._insert(batch, book))
+        else:
+            await self._insert(session, book)
+            await session.commit()
+
         return book
 
-    def list(self, session: Session, user_id: int) -> list[Book]:
+    async def bulk_create(
+        self,
+        session: AsyncSession,
+        books: Sequence[BookCreate],
+        *,
+        user_id: int,
+        chunk_size: int,
+    ) -> Sequence[int | SQLAlchemyError]:
+        """
+        Insere em lotes de `chunk_size`, um INSERT multi-linha com RETURNING e
+        um commit por lote. Devolve, na ordem da entrada, o id criado ou o erro
+        que desfez o lote daquele livro.
+        """
+        results: list[int | SQLAlchemyError] = []
+
+        for start in range(0, len(books), chunk_size):
+            chunk = [
+                {**book.model_dump(), "user_id": user_id}
+                for book in books[start : start + chunk_size]
+            ]
+            statement = (
+                insert(Book)
+                .values(
+                    version=_next_library_version(user_id),
+                    change_seq=_next_library_version(user_id),
+                )
+                .returning(Book.id, sort_by_parameter_order=True)
+            )
+
+            try:
+                ids = (await session.exec(statement, params=chunk)).scalars().all()
+                await session.commit()
+            except SQLAlchemyError as err:
+                await session.rollback()
+                results.extend([err] * len(chunk))
+                continue
+
+            results.extend(ids)
+
+        return results
+
+    async def list(self, session: AsyncSession, user_id: int) -> list[Book]:
         statement = select(Book).where(Book.user_id == user_id)
-        return session.exec(statement).all()
+        return (await session.exec(statement)).all()
 
-    def list_paginated(
+    async def list_paginated(
         self,
-        session: Session,
+        session: AsyncSession,
         *,
         page: int,
         size: int,
         filters: BookFilters,
         user_id: int,
-    ):
+        include_total: bool = True,
+        fields: Sequence[str] = READ_FIELDS,
+        library_version: int | None = None,
+    ) -> tuple[Sequence[tuple], int | None, bool]:
+        """
+        Página de livros como tuplas de `read_columns(fields)`, prontas para
+        o JSON de `BookRead`.
+
+        `library_version` é a versão já lida pela rota (a do ETag) e valida o
+        total em cache da listagem sem filtros; sem ela, o total é contado.
+        """
         offset = (page - 1) * size
+        # só o total sem filtros vai para o cache, validado pela versão
+        cacheable = library_version is not None and not (
+            filters.status or filters.author or filters.title
+        )
+        columns = read_columns(fields)
 
-        conditions = [Book.user_id == user_id]
+        conditions = self._conditions(filters, user_id)
+        statement = self._order(select(*columns).where(*conditions), filters).offset(offset)
 
-        if filters.status:
-            conditions.append(Book.status == filters.status)
+        if not include_total:
+            # Uma linha a mais indica que existe próxima página
+            items = (await session.exec(statement.limit(size + 1))).all()
+            return items[:size], None, len(items) > size
+
+        cached_total = book_counts.get(user_id, library_version) if cacheable else None
+        if cached_total is not None:
+            items = (await session.exec(statement.limit(size))).all()
+            return items, cached_total, offset + len(items) < cached_total
 
-        if filters.author:
-            conditions.append(Book.author.ilike(f"%{filters.author}%"))
+        total = self._count(conditions)
+        statement = select(*columns, total.label("total")).where(*conditions)
+        items, total = await self._page_with_total(
+            session, self._order(statement, filters), total, offset=offset, size=size
+        )
 
-        if filters.title:
-            conditions.append(Book.title.ilike(f"%{filters.title}%"))
+        if cacheable:
+            # Versão lida antes da contagem: se uma escrita cair no meio, o
+            # total fica guardado sob a versão velha e a próxima leitura erra
+            book_counts.store(user_id, total, library_version)
 
-        # Query base (sem paginação)
-        statement = select(Book).where(*conditions)
+        return items, total, offset + len(items) < total
 
-        # Contagem total usando subquery
-        total = session.exec(select(func.count()).select_from(statement.subquery())).one()
+    async def list_keyset(
+        self,
+        session: AsyncSession,
+        *,
+        size: int,
+        filters: BookFilters,
+        user_id: int,
+        after: BookCursor | None = None,
+    ) -> tuple[Sequence[Book], BookCursor | None]:
+        """
+        Paginação por cursor: filtra a partir da última linha entregue em vez
+        de usar OFFSET, então o custo de qualquer página é o mesmo da primeira.
+        """
+        column = ORDER_FIELDS[filters.order_by]
+        raw_value = type_coerce(column, String)
 
-        # Ordenação
-        allowed_order_fields = {
-            "title": Book.title,
-            "author": Book.author,
-            "created_at": Book.created_at,
-            "start_date": Book.start_date,
-            "end_date": Book.end_date,
-        }
+        conditions = self._conditions(filters, user_id)
+        if after is not None:
+            conditions.append(self._after(raw_value, after, descending=filters.order == "desc"))
 
-        column = allowed_order_fields.get(filters.order_by, Book.created_at)
+        # Busca uma linha a mais para saber se existe próxima página
+        statement = select(Book, raw_value.label("cursor_value")).where(*conditions)
+        statement = self._order(statement, filters).limit(size + 1)
 
-        if filters.order == "desc":
-            statement = statement.order_by(column.desc())
+        rows = (await session.exec(statement)).all()
+
+        next_cursor = None
+        if len(rows) > size:
+            rows = rows[:size]
+            last_book, last_value = rows[-1]
+            next_cursor = BookCursor(
+                order_by=filters.order_by,
+                order=filters.order,
+                value=last_value,
+                id=last_book.id,
+            )
+
+        return [book for book, _ in rows], next_cursor
+
+    async def stream(
+        self,
+        session: AsyncSession,
+        *,
+        filters: BookFilters,
+        user_id: int,
+        batch_size: int,
+        fields: Sequence[str] = READ_FIELDS,
+    ) -> AsyncIterator[Sequence[Row]]:
+        """
+        Todos os livros do filtro, como tuplas de `read_columns(fields)`, em
+        lotes de `batch_size` lidos de um cursor aberto no banco (`yield_per`):
+        a memória não cresce com a biblioteca.
+        """
+        conditions = self._conditions(filters, user_id)
+        statement = self._order(select(*read_columns(fields)).where(*conditions), filters)
+
+        result = await session.stream(statement, execution_options={"yield_per": batch_size})
+        async for batch in result.partitions():
+            yield batch
+
+    async def search(
+        self,
+        session: AsyncSession,
+        *,
+        query: str,
+        page: int,
+        size: int,
+        user_id: int,
+    ) -> tuple[Sequence[Book], int, bool]:
+        """
+        Busca livre em título e autor, ordenada por relevância (bm25) quando
+        o índice FTS5 está disponível. Sem ele, cai no ilike ordenado por título.
+        """
+        offset = (page - 1) * size
+        terms = query.split()
+        indexed = [term for term in terms if search_index.supports(term)]
+
+        conditions = [Book.user_id == user_id]
+
+        # Termos curtos demais para o trigram continuam no ilike
+        for term in terms:
+            if term not in indexed:
+                conditions.append(
+                    or_(Book.title.ilike(f"%{term}%"), Book.author.ilike(f"%{term}%"))
+                )
+
+        if indexed:
+            match = search_index.match_all(indexed, user_id)
+            total = self._count([*conditions, Book.id.in_(select(book_fts.c.rowid).where(match))])
+            statement = (
+                select(Book, total.label("total"))
+                .join(book_fts, book_fts.c.rowid == Book.id)
+                .where(*conditions, match)
+                .order_by(book_fts.c.rank, Book.id)
+            )
         else:
-            statement = statement.order_by(column.asc())
+            total = self._count(conditions)
+            statement = (
+                select(Book, total.label("total")).where(*conditions).order_by(Book.title, Book.id)
+            )
 
-        # Paginação
-        statement = statement.offset(offset).limit(size)
+        rows, total = await self._page_with_total(
+            session, statement, total, offset=offset, size=size
+        )
+        items = [book for (book,) in rows]
 
-        items = session.exec(statement).all()
+        return items, total, offset + len(items) < total
 
-        return items, total
+    async def library_version(self, session: AsyncSession, user_id: int) -> int:
+        statement = select(LibraryVersion.version).where(LibraryVersion.user_id == user_id)
+        return (await session.exec(statement)).one_or_none() or 0
 
-    def get_by_id(self, session: Session, book_id: int, user_id: int) -> Book | None:
+    async def get_by_id(self, session: AsyncSession, book_id: int, user_id: int) -> Book | None:
         statement = select(Book).where(Book.id == book_id, Book.user_id == user_id)
-        return session.exec(statement).one_or_none()
+        return (await session.exec(statement)).one_or_none()
 
-    def update(self, session: Session, book: Book) -> Book:
+    async def get_row(
+        self,
+        session: AsyncSession,
+        book_id: int,
+        user_id: int,
+        fields: Sequence[str] = READ_FIELDS,
+    ) -> Row | None:
+        """
+        Leitura projetada de um livro: `read_columns(fields)` seguidas de `version`.
+        """
+        statement = select(*read_columns(fields), Book.version).where(
+            Book.id == book_id, Book.user_id == user_id
+        )
+        return (await session.exec(statement)).one_or_none()
+
+    async def update(
+        self, session: AsyncSession, book_id: int, *, user_id: int, values: dict[str, Any]
+    ) -> Book | None:
+        """
+        UPDATE ... RETURNING em um único comando; None se o livro não existe
+        ou é de outro usuário.
+        """
+        if not values:
+            return await self.get_by_id(session, book_id, user_id=user_id)
+
+        if self.writes is not None:
+            return await self.writes.submit(
+                lambda batch: self._update(batch, book_id, user_id=user_id, values=values)
+            )
+
+        book = await self._update(session, book_id, user_id=user_id, values=values)
+        await session.commit()
+        return book
+
+    async def _insert(self, session: AsyncSession, book: Book) -> Book:
+        # id, created_at, version e change_seq voltam no RETURNING do próprio
+        # INSERT (eager_defaults); o commit fica com quem chama
+        book.version = book.change_seq = _next_library_version(book.user_id)
         session.add(book)
-        session.commit()
-        session.refresh(book)
+        await session.flush()
         return book
 
-    def delete(self, session: Session, book: Book) -> None:
-        session.delete(book)
-        session.commit()
+    async def _update(
+        self, session: AsyncSession, book_id: int, *, user_id: int, values: dict[str, Any]
+    ) -> Book | None:
+        statement = (
+            update(Book)
+            .where(Book.id == book_id, Book.user_id == user_id)
+            .values(**values, version=Book.version + 1, change_seq=_next_library_version(user_id))
+            .returning(Book)
+        )
+        return (await session.exec(statement)).scalars().one_or_none()
+
+    async def delete(self, session: AsyncSession, book_id: int, *, user_id: int) -> bool:
+        conditions = [Book.id == book_id, Book.user_id == user_id]
+        await self._tombstone(session, conditions, user_id)
+
+        statement = delete(Book).where(*conditions).returning(Book.id)
+        deleted = (await session.exec(statement)).scalar_one_or_none()
+        await session.commit()
+        return deleted is not None
+
+    async def bulk_update(
+        self,
+        session: AsyncSession,
+        selection: BulkSelection,
+        *,
+        user_id: int,
+        values: dict[str, Any],
+    ) -> int:
+        statement = (
+            update(Book)
+            .where(*self._selection(selection, user_id))
+            .values(**values, version=Book.version + 1, change_seq=_next_library_version(user_id))
+        )
+        result = await session.exec(statement.execution_options(synchronize_session=False))
+        await session.commit()
+        return result.rowcount
+
+    async def bulk_delete(
+        self, session: AsyncSession, selection: BulkSelection, *, user_id: int
+    ) -> int:
+        conditions = self._selection(selection, user_id)
+        await self._tombstone(session, conditions, user_id)
+
+        statement = delete(Book).where(*conditions)
+        result = await session.exec(statement.execution_options(synchronize_session=False))
+        await session.commit()
+        return result.rowcount
+
+    async def changes(
+        self, session: AsyncSession, *, user_id: int, after: ChangeCursor, size: int
+    ) -> tuple[Sequence[Book], Sequence[BookTombstone], ChangeCursor, bool]:
+        """
+        Livros escritos e apagados depois de `after`, na ordem (change_seq, id),
+        até `size` mudanças no total. Devolve também o cursor da última
+        mudança entregue e se há mais.
+        """
+        books = await session.exec(
+            select(Book)
+            .where(Book.user_id == user_id, _after_change(Book.change_seq, Book.id, after))
+            .order_by(Book.change_seq, Book.id)
+            .limit(size + 1)
+        )
+        tombstones = await session.exec(
+            select(BookTombstone)
+            .where(
+                BookTombstone.user_id == user_id,
+                _after_change(BookTombstone.change_seq, BookTombstone.book_id, after),
+            )
+            .order_by(BookTombstone.change_seq, BookTombstone.book_id)
+            .limit(size + 1)
+        )
+
+        changes = sorted(
+            [(book.change_seq, book.id, book) for book in books]
+            + [(tombstone.change_seq, tombstone.book_id, tombstone) for tombstone in tombstones],
+            key=lambda change: change[:2],
+        )
+        page = changes[:size]
+        cursor = ChangeCursor(seq=page[-1][0], id=page[-1][1]) if page else after
+
+        return (
+            [row for *_, row in page if isinstance(row, Book)],
+            [row for *_, row in page if isinstance(row, BookTombstone)],
+            cursor,
+            len(changes) > size,
+        )
+
+    async def _tombstone(self, session: AsyncSession, conditions: list, user_id: int) -> None:
+        # Antes do DELETE e na mesma transação: a lápide leva o change_seq que o
+        # próprio DELETE consome ao incrementar a versão da biblioteca
+        rows = select(Book.id, Book.user_id, _next_library_version(user_id)).where(*conditions)
+        statement = insert(BookTombstone).from_select(["book_id", "user_id", "change_seq"], rows)
+        await session.exec(statement)
+
+    def _selection(self, selection: BulkSelection, user_id: int) -> list:
+        # Sempre restrito ao usuário: ids de outra pessoa simplesmente não casam
+        if selection.ids is not None:
+            return [Book.user_id == user_id, Book.id.in_(selection.ids)]
+        return self._conditions(selection.filters, user_id)
+
+    def _conditions(self, filters: BookFilters, user_id: int) -> list:
+        conditions = [Book.user_id == user_id]
+
+        if filters.status:
+            conditions.append(Book.status == filters.status)
+
+        # Termos suportados vão para o índice FTS5; o resto continua no ilike
+        fts_terms = {}
+
+        for name, column, value in (
+            ("author", Book.author, filters.author),
+            ("title", Book.title, filters.title),
+        ):
+            if not value:
+                continue
+            if search_index.supports(value):
+                fts_terms[name] = value
+            else:
+                conditions.append(column.ilike(f"%{value}%"))
+
+        if fts_terms:
+            matches = select(book_fts.c.rowid).where(search_index.match(user_id, **fts_terms))
+            conditions.append(Book.id.in_(matches))
+
+        return conditions
+
+    def _count(self, conditions: list):
+        # Subquery escalar sem correlação: o SQLite calcula uma vez por query
+        return select(func.count()).select_from(Book).where(*conditions).scalar_subquery()
+
+    async def _page_with_total(
+        self, session: AsyncSession, statement, total, *, offset: int, size: int
+    ):
+        # O total vem na coluna `total`, a última da própria query da página
+        rows = (await session.exec(statement.offset(offset).limit(size))).all()
+
+        if rows:
+            return [row[:-1] for row in rows], rows[0].total
+
+        if offset == 0:
+            return [], 0
+
+        # Página além do fim: nenhuma linha traz a coluna, então conta à parte
+        return [], (await session.exec(select(total))).one()
+
+    def _order(self, statement, filters: BookFilters):
+        # Book.id desempata valores repetidos, deixando a ordem estável entre páginas
+        column = ORDER_FIELDS.get(filters.order_by, Book.created_at)
+
+        if filters.order == "desc":
+            return statement.order_by(column.desc(), Book.id.desc())
+
+        return statement.order_by(column.asc(), Book.id.asc())
+
+    def _after(self, column, cursor: BookCursor, *, descending: bool):
+        # SQLite ordena NULL antes de qualquer valor: primeiro no ASC, por último no DESC
+        if descending:
+            if cursor.value is None:
+                return and_(column.is_(None), Book.id < cursor.id)
+            return or_(
+                column < cursor.value,
+                and_(column == cursor.value, Book.id < cursor.id),
+                column.is_(None),
+            )
+
+        if cursor.value is None:
+            return or_(
+                and_(column.is_(None), Book.id > cursor.id),
+                column.is_not(None),
+            )
+        return or_(
+            column > cursor.value,
+            and_(column == cursor.value, Book.id > cursor.id),
+        )
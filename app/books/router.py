@@ -1,13 +1,35 @@
-from fastapi import APIRouter, Depends, Query, status
-from fastapi.responses import Response
-from sqlmodel import Session
+from typing import Literal
 
-from app.core.database import get_session
+from fastapi import APIRouter, Depends, Query, Request, status
+from fastapi.responses import Response, StreamingResponse
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import BOOK_BULK_MAX_ITEMS
+from app.core.database import get_read_session, get_session
 from app.core.error_schema import ErrorResponse
+from app.core.etag import etag_matches, weak_etag
+from app.core.responses import FastJSONResponse
 from app.users.dependencies import get_current_user
 from app.users.model import User
 
-from .model import BookCreate, BookFilters, BookRead, BookUpdate, Page
+from .bulk import parse_bulk_books
+from .export import EXPORT_MEDIA_TYPES, export_chunks
+from .model import (
+    FIELDS_PATTERN,
+    BookChanges,
+    BookCreate,
+    BookFilters,
+    BookRead,
+    BookUpdate,
+    BulkCreateResult,
+    BulkSelection,
+    BulkUpdate,
+    BulkWriteResult,
+    CursorPage,
+    Page,
+    parse_fields,
+)
+from .serializers import book_json, cursor_page_json, page_json
 from .service import BookService
 
 router = APIRouter(prefix="/books", tags=["Books"])
@@ -15,6 +37,29 @@ router = APIRouter(prefix="/books", tags=["Books"])
 service = BookService()
 
 
+def _cache_headers(etag: str) -> dict[str, str]:
+    # `no-cache` faz o navegador sempre revalidar em vez de usar a cópia às cegas
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+def _not_modified(request: Request, etag: str) -> Response | None:
+    # 304 se o cliente já tem esta versão
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=_cache_headers(etag))
+    return None
+
+
+def _book_fields(
+    fields: str | None = Query(
+        None,
+        pattern=FIELDS_PATTERN,
+        description="Comma-separated BookRead fields, e.g. `title,status`",
+    ),
+) -> tuple[str, ...]:
+    # Nome fora de BookRead não casa com o padrão e vira 422
+    return parse_fields(fields)
+
+
 @router.post(
     "/",
     response_model=BookRead,
@@ -23,51 +68,264 @@ service = BookService()
         422: {"model": ErrorResponse, "description": "Validation error"},
     },
 )
-def create(
+async def create(
     book: BookCreate,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    book = await service.create_book(session, book, current_user)
+    return FastJSONResponse(book_json(book), status_code=status.HTTP_201_CREATED)
+
+
+@router.post(
+    "/bulk",
+    response_model=BulkCreateResult,
+    responses={
+        400: {"model": ErrorResponse, "description": "Malformed body"},
+        413: {"model": ErrorResponse, "description": "Too many books"},
+    },
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {"type": "array", "items": BookCreate.model_json_schema()}
+                },
+                "application/x-ndjson": {"schema": BookCreate.model_json_schema()},
+            },
+        }
+    },
+)
+async def bulk_create(
+    request: Request,
+    session: AsyncSession = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Importa vários livros de uma vez: um array JSON ou NDJSON
+    (`Content-Type: application/x-ndjson`, um livro por linha).
+    Cada item volta com o `id` criado ou com seus `errors`.
+    """
+    books, invalid = await parse_bulk_books(
+        request.stream(),
+        request.headers.get("content-type", ""),
+        max_items=BOOK_BULK_MAX_ITEMS,
+    )
+
+    return await service.bulk_create_books(session, books, current_user, invalid)
+
+
+@router.patch(
+    "/bulk",
+    response_model=BulkWriteResult,
+    responses={
+        422: {"model": ErrorResponse, "description": "Validation error"},
+    },
+)
+async def bulk_update(
+    bulk_update: BulkUpdate,
+    session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ):
-    return service.create_book(session, book, current_user)
+    """
+    Aplica o mesmo `patch` a todos os livros selecionados por `ids` ou
+    `filters`, em um único UPDATE. Devolve quantos livros foram alterados.
+    """
+    return await service.bulk_update_books(session, bulk_update, current_user)
+
+
+@router.delete(
+    "/bulk",
+    response_model=BulkWriteResult,
+    responses={
+        422: {"model": ErrorResponse, "description": "Validation error"},
+    },
+)
+async def bulk_delete(
+    selection: BulkSelection,
+    session: AsyncSession = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Remove todos os livros selecionados por `ids` ou `filters` em um único
+    DELETE. Devolve quantos livros foram removidos.
+    """
+    return await service.bulk_delete_books(session, selection, current_user)
 
 
 @router.get(
     "/",
-    response_model=Page[BookRead],
+    response_model=Page[BookRead] | CursorPage[BookRead],
     responses={
+        304: {"description": "Not modified"},
+        400: {"model": ErrorResponse, "description": "Invalid cursor"},
         422: {"model": ErrorResponse, "description": "Validation error"},
     },
 )
-def list_books(
-    session: Session = Depends(get_session),
+async def list_books(
+    request: Request,
+    session: AsyncSession = Depends(get_read_session),
     current_user: User = Depends(get_current_user),
     page: int = Query(1, ge=1),
     size: int = Query(10, ge=1, le=100),
+    pagination: Literal["page", "cursor"] = Query("page"),
+    cursor: str | None = Query(None),
+    include_total: bool = Query(True),
     filters: BookFilters = Depends(),
+    fields: tuple[str, ...] = Depends(_book_fields),
 ):
-    return service.list_books_paginated(
+    """
+    `pagination=page` (padrão) devolve `Page` com total e número de páginas.
+    `pagination=cursor` (ou enviar `cursor`) devolve `CursorPage`, cujo
+    `next_cursor` deve ser repassado para buscar a página seguinte.
+    `include_total=false` pula a contagem; `total` e `pages` vêm nulos.
+    `fields` limita os campos de cada livro (e as colunas lidas do banco).
+    """
+    # A versão é lida antes da listagem: se uma escrita cair entre as duas, o
+    # ETag fica mais velho que o conteúdo e o próximo GET só baixa tudo de novo
+    version = await service.library_version(session, current_user)
+    etag = weak_etag(
+        current_user.id,
+        version,
+        pagination,
+        cursor,
+        page,
+        size,
+        include_total,
+        filters.model_dump(),
+        fields,
+    )
+    if not_modified := _not_modified(request, etag):
+        return not_modified
+
+    # JSON já pronto: o response_model acima só documenta o formato
+    if pagination == "cursor" or cursor is not None:
+        content = cursor_page_json(
+            await service.list_books_by_cursor(
+                session=session,
+                size=size,
+                filters=filters,
+                user=current_user,
+                cursor=cursor,
+            ),
+            fields,
+        )
+    else:
+        content = await service.list_books_paginated(
+            session=session,
+            page=page,
+            size=size,
+            filters=filters,
+            user=current_user,
+            include_total=include_total,
+            fields=fields,
+            library_version=version,
+        )
+
+    return FastJSONResponse(content, headers=_cache_headers(etag))
+
+
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "content": {media_type: {} for media_type in EXPORT_MEDIA_TYPES.values()},
+            "description": "Every book matching the filters",
+        },
+        422: {"model": ErrorResponse, "description": "Validation error"},
+    },
+)
+async def export_books(
+    session: AsyncSession = Depends(get_read_session),
+    current_user: User = Depends(get_current_user),
+    format: Literal["ndjson", "csv"] = Query("ndjson"),
+    filters: BookFilters = Depends(),
+    fields: tuple[str, ...] = Depends(_book_fields),
+):
+    """
+    Exporta a biblioteca inteira (respeitando filtros e ordenação) em NDJSON
+    ou CSV, só com as colunas de `fields`. As linhas são enviadas conforme
+    saem do banco.
+    """
+    batches = service.export_books(session, filters, current_user, fields)
+
+    return StreamingResponse(
+        export_chunks(batches, format, fields),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="books.{format}"'},
+    )
+
+
+@router.get(
+    "/changes",
+    response_model=BookChanges,
+    responses={
+        400: {"model": ErrorResponse, "description": "Invalid cursor"},
+        422: {"model": ErrorResponse, "description": "Validation error"},
+    },
+)
+async def list_changes(
+    session: AsyncSession = Depends(get_read_session),
+    current_user: User = Depends(get_current_user),
+    since: str | None = Query(None),
+    size: int = Query(100, ge=1, le=1000),
+):
+    """
+    Sincronização incremental: livros criados, alterados ou apagados depois de
+    `since`. Sem `since`, começa do zero (a biblioteca inteira). Repita com o
+    `next_cursor` devolvido enquanto `has_more` for verdadeiro.
+    """
+    return await service.list_changes(session, current_user, since, size)
+
+
+@router.get(
+    "/search",
+    response_model=Page[BookRead],
+    responses={
+        422: {"model": ErrorResponse, "description": "Validation error"},
+    },
+)
+async def search_books(
+    q: str = Query(..., min_length=1, max_length=200),
+    session: AsyncSession = Depends(get_read_session),
+    current_user: User = Depends(get_current_user),
+    page: int = Query(1, ge=1),
+    size: int = Query(10, ge=1, le=100),
+):
+    result = await service.search_books(
         session=session,
+        query=q,
         page=page,
         size=size,
-        filters=filters,
         user=current_user,
     )
+    return FastJSONResponse(page_json(result))
 
 
 @router.get(
     "/{book_id}",
     response_model=BookRead,
     responses={
+        304: {"description": "Not modified"},
         404: {"model": ErrorResponse, "description": "Book not found"},
         422: {"model": ErrorResponse, "description": "Validation error"},
     },
 )
-def get_book(
+async def get_book(
     book_id: int,
-    session: Session = Depends(get_session),
+    request: Request,
+    session: AsyncSession = Depends(get_read_session),
     current_user: User = Depends(get_current_user),
+    fields: tuple[str, ...] = Depends(_book_fields),
 ):
-    return service.get_book(session, book_id, current_user)
+    version, content = await service.get_book(session, book_id, current_user, fields)
+    etag = weak_etag(book_id, version, fields)
+
+    if not_modified := _not_modified(request, etag):
+        return not_modified
+
+    return FastJSONResponse(content, headers=_cache_headers(etag))
 
 
 @router.put(
@@ -78,13 +336,14 @@ def get_book(
         422: {"model": ErrorResponse, "description": "Validation error"},
     },
 )
-def update_book(
+async def update_book(
     book_id: int,
     book_update: BookUpdate,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ):
-    return service.update_book(session, book_id, book_update, current_user)
+    book = await service.update_book(session, book_id, book_update, current_user)
+    return FastJSONResponse(book_json(book))
 
 
 @router.delete(
@@ -96,10 +355,10 @@ def update_book(
         422: {"model": ErrorResponse, "description": "Validation error"},
     },
 )
-def delete_book(
+async def delete_book(
     book_id: int,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ):
-    service.delete_book(session, book_id, current_user)
+    await service.delete_book(session, book_id, current_user)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
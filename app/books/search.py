@@ -0,0 +1,134 @@
+from sqlalchemy import Connection, column, event, literal_column, table
+from sqlalchemy.exc import OperationalError
+
+from .model import Book
+
+FTS_TABLE = "book_fts"
+
+# O tokenizer trigram faz o MATCH encontrar substrings, como o ilike('%x%')
+# que ele substitui, mas só para termos com pelo menos 3 caracteres.
+MIN_TERM_LENGTH = 3
+
+book_fts = table(FTS_TABLE, column("rowid"), column("rank"))
+
+# O banco é compartilhado por todos os usuários: a coluna `owner` guarda o
+# dono como "<id>" e entra em todo MATCH, então o FTS5 só percorre os livros
+# de quem consulta. Os delimitadores impedem que "<1>" case com "<12>".
+_CONTENT = f"{FTS_TABLE}_content"
+
+_DDL = [
+    f"""
+    CREATE VIEW IF NOT EXISTS {_CONTENT} AS
+    SELECT id, title, author, '<' || user_id || '>' AS owner FROM book
+    """,
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, author, owner, content='{_CONTENT}', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    # owner casa com todos os livros do usuário: fica fora da relevância
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) VALUES ('rank', 'bm25(1.0, 1.0, 0.0)')",
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON book BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, author, owner)
+        VALUES (new.id, new.title, new.author, '<' || new.user_id || '>');
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON book BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, author, owner)
+        VALUES ('delete', old.id, old.title, old.author, '<' || old.user_id || '>');
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, author, user_id ON book
+    BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, author, owner)
+        VALUES ('delete', old.id, old.title, old.author, '<' || old.user_id || '>');
+        INSERT INTO {FTS_TABLE}(rowid, title, author, owner)
+        VALUES (new.id, new.title, new.author, '<' || new.user_id || '>');
+    END
+    """,
+]
+
+
+class BookSearchIndex:
+    """
+    Índice FTS5 "sombra" de título e autor dos livros.
+
+    O conteúdo vem da tabela `book` (external content, por uma view que
+    acrescenta o dono) e triggers mantêm o índice sincronizado em qualquer
+    insert, update ou delete.
+    Quando o SQLite não tem FTS5 (ou o tokenizer trigram), `available` fica
+    False e o repositório continua usando ilike.
+    """
+
+    def __init__(self):
+        self.available = False
+
+    def install(self, connection: Connection) -> bool:
+        if connection.dialect.name != "sqlite":
+            self.available = False
+            return False
+
+        existed = connection.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE name = ?", (FTS_TABLE,)
+        ).first()
+
+        try:
+            for statement in _DDL:
+                connection.exec_driver_sql(statement)
+        except OperationalError:
+            self.available = False
+            return False
+
+        if not existed:
+            # Tabela já tinha livros: popula o índice a partir deles
+            connection.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+        self.available = True
+        return True
+
+    def drop(self, connection: Connection) -> None:
+        if connection.dialect.name == "sqlite":
+            connection.exec_driver_sql(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+            connection.exec_driver_sql(f"DROP VIEW IF EXISTS {_CONTENT}")
+
+    def supports(self, term: str) -> bool:
+        return self.available and len(term) >= MIN_TERM_LENGTH
+
+    def match(self, user_id: int, **terms: str):
+        """
+        Condição `book_fts MATCH ...` restrita por coluna e aos livros de
+        `user_id`, com cada termo tratado como frase literal (sem a sintaxe de
+        consulta do FTS5).
+        """
+        expression = " AND ".join(f"{name} : {self.quote(value)}" for name, value in terms.items())
+        return literal_column(FTS_TABLE).match(f"{expression} AND {self._owner(user_id)}")
+
+    def match_all(self, terms: list[str], user_id: int):
+        expression = " AND ".join(self.quote(term) for term in terms)
+        return literal_column(FTS_TABLE).match(
+            f"{{title author}} : ({expression}) AND {self._owner(user_id)}"
+        )
+
+    @staticmethod
+    def _owner(user_id: int) -> str:
+        return f'owner : "<{user_id}>"'
+
+    @staticmethod
+    def quote(term: str) -> str:
+        return '"' + term.replace('"', '""') + '"'
+
+
+search_index = BookSearchIndex()
+
+
+@event.listens_for(Book.__table__, "after_create")
+def _create_search_index(target, connection, **kw):
+    search_index.install(connection)
+
+
+@event.listens_for(Book.__table__, "before_drop")
+def _drop_search_index(target, connection, **kw):
+    search_index.drop(connection)
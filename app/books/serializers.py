@@ -0,0 +1,61 @@
+"""
+JSON das respostas de livros direto das linhas do banco.
+
+As rotas de leitura devolvem estes bytes numa `FastJSONResponse`: o `Book`
+vira o formato de `BookRead` numa única passada do serializador, sem criar um
+`BookRead` por linha nem a validação do `response_model` do FastAPI.
+
+Listagem, detalhe e exportação nem chegam a montar o `Book`: leem só as
+colunas pedidas em `fields` como tuplas (`read_columns` do repositório),
+serializadas como `BookRow`.
+"""
+
+from collections.abc import Sequence
+
+from pydantic import TypeAdapter
+
+from .model import READ_FIELDS, Book, BookRow, CursorPage, Page
+
+_row = TypeAdapter(BookRow)
+_row_page = TypeAdapter(Page[BookRow])
+_row_cursor_page = TypeAdapter(CursorPage[BookRow])
+
+
+def book_row(book: Book, fields: Sequence[str] = READ_FIELDS) -> dict:
+    # Chaves na ordem de `BookRead`, como nas linhas projetadas: um `Book` que
+    # veio de um RETURNING ou do ORM tem o `__dict__` em outra ordem
+    return {name: getattr(book, name) for name in fields}
+
+
+def book_json(book: Book) -> bytes:
+    return _row.dump_json(book_row(book))
+
+
+def page_json(page: Page[Book]) -> bytes:
+    items = [book_row(book) for book in page.items]
+    return _row_page.dump_json(Page[BookRow].model_construct(**dict(page, items=items)))
+
+
+def cursor_page_json(page: CursorPage[Book], fields: Sequence[str] = READ_FIELDS) -> bytes:
+    items = [book_row(book, fields) for book in page.items]
+    shell = CursorPage[BookRow].model_construct(**dict(page, items=items))
+    return _row_cursor_page.dump_json(shell)
+
+
+def row_json(row: Sequence, fields: Sequence[str] = READ_FIELDS) -> bytes:
+    return _row.dump_json(dict(zip(fields, row, strict=True)))
+
+
+def row_python(row: Sequence, fields: Sequence[str] = READ_FIELDS) -> dict:
+    # Valores já no formato do JSON (datas ISO, enum pelo valor), para o CSV
+    return _row.dump_python(dict(zip(fields, row, strict=True)), mode="json")
+
+
+def row_page_json(rows: Sequence[Sequence], fields: Sequence[str] = READ_FIELDS, **page) -> bytes:
+    """
+    `page` são os argumentos de `Page.create`. Os itens entram depois da
+    criação, sem validação: as linhas já vêm do banco com os tipos certos.
+    """
+    items = [dict(zip(fields, row, strict=True)) for row in rows]
+    shell = Page[BookRow].create(items=[], **page)
+    return _row_page.dump_json(shell.model_copy(update={"items": items}))
@@ -1,77 +1,313 @@
-from sqlmodel import Session
+from collections.abc import AsyncIterator, Sequence
 
-from app.core.exceptions import NotFoundException
+from sqlalchemy import Row
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import BOOK_BULK_CHUNK_SIZE, BOOK_EXPORT_BATCH_SIZE
+from app.core.database import note_write
+from app.core.exceptions import BadRequestException, NotFoundException
+from app.core.read_cache import ReadCache
+from app.core.singleflight import SingleFlight
+from app.core.write_coalescer import WriteCoalescer
 from app.users.model import User
 
-from .model import Book, BookCreate, BookFilters, BookUpdate, Page
-from .repository import BookRepository
+from .cache import book_key, book_read_cache, book_reads, page_key
+from .model import (
+    READ_FIELDS,
+    Book,
+    BookChanges,
+    BookCreate,
+    BookCursor,
+    BookFilters,
+    BookUpdate,
+    BulkCreateResult,
+    BulkItemResult,
+    BulkSelection,
+    BulkUpdate,
+    BulkWriteResult,
+    ChangeCursor,
+    CursorPage,
+    Page,
+)
+from .repository import BookRepository, book_writes
+from .serializers import row_json, row_page_json
 
 
 class BookService:
-    def __init__(self):
-        self.repository = BookRepository()
+    def __init__(
+        self,
+        cache: ReadCache | None = None,
+        flights: SingleFlight | None = None,
+        writes: WriteCoalescer | None = None,
+    ):
+        self.repository = BookRepository(writes or book_writes)
+        # Leituras de página e de livro passam por aqui; escritas invalidam
+        self.cache = cache or book_read_cache
+        self.flights = flights or book_reads
 
-    def create_book(self, session: Session, book_create: BookCreate, user: User) -> Book:
+    async def create_book(self, session: AsyncSession, book_create: BookCreate, user: User) -> Book:
         book = Book(
             **book_create.model_dump(),
             user_id=user.id,
         )
-        return self.repository.create(session, book)
+        book = await self.repository.create(session, book)
+        self._invalidate(user.id)
+        return book
+
+    async def bulk_create_books(
+        self,
+        session: AsyncSession,
+        books: list[tuple[int, BookCreate]],
+        user: User,
+        invalid: list[BulkItemResult] | None = None,
+    ) -> BulkCreateResult:
+        """
+        `books` traz cada livro válido com sua posição no corpo da requisição;
+        `invalid` são os itens que já falharam na validação.
+        """
+        created = await self.repository.bulk_create(
+            session,
+            [book for _, book in books],
+            user_id=user.id,
+            chunk_size=BOOK_BULK_CHUNK_SIZE,
+        )
+        if created:
+            self._invalidate(user.id)
+
+        items = list(invalid or [])
+        for (index, _), result in zip(books, created, strict=True):
+            if isinstance(result, int):
+                items.append(BulkItemResult(index=index, id=result))
+            else:
+                error = {"type": "database_error", "msg": "Could not store this book"}
+                items.append(BulkItemResult(index=index, errors=[error]))
 
-    def list_books(self, session: Session, user: User) -> list[Book]:
-        return self.repository.list(session, user_id=user.id)
+        items.sort(key=lambda item: item.index)
+        failed = sum(1 for item in items if item.errors)
 
-    def list_books_paginated(
+        return BulkCreateResult(created=len(items) - failed, failed=failed, items=items)
+
+    async def list_books(self, session: AsyncSession, user: User) -> list[Book]:
+        return await self.repository.list(session, user_id=user.id)
+
+    async def list_books_paginated(
         self,
-        session: Session,
+        session: AsyncSession,
         page: int,
         size: int,
         filters: BookFilters,
         user: User,
-    ) -> Page[Book]:
+        include_total: bool = True,
+        fields: Sequence[str] = READ_FIELDS,
+        library_version: int | None = None,
+    ) -> bytes:
+        """
+        JSON pronto da página (formato `Page[BookRead]`, só com `fields`): o
+        mesmo que fica no cache, então um hit não desserializa nem valida nada.
+        `library_version`, a versão lida pela rota para o ETag, faz parte da
+        chave do cache e valida o total em cache.
+        """
+        key = page_key(
+            filters=filters,
+            page=page,
+            size=size,
+            include_total=include_total,
+            fields=fields,
+            library_version=library_version,
+        )
+        cached, generation = self.cache.get(user.id, key)
+        if cached is not None:
+            return cached
+
+        async def load() -> bytes:
+            items, total, has_next = await self.repository.list_paginated(
+                session=session,
+                page=page,
+                size=size,
+                filters=filters,
+                user_id=user.id,
+                include_total=include_total,
+                fields=fields,
+                library_version=library_version,
+            )
 
-        items, total = self.repository.list_paginated(
+            result = row_page_json(
+                items, fields, total=total, page=page, size=size, has_next=has_next
+            )
+            self.cache.set(user.id, key, result, generation)
+            return result
+
+        return await self.flights.do(user.id, key, load)
+
+    async def list_books_by_cursor(
+        self,
+        session: AsyncSession,
+        size: int,
+        filters: BookFilters,
+        user: User,
+        cursor: str | None = None,
+    ) -> CursorPage[Book]:
+        after = self._decode_cursor(cursor, filters) if cursor else None
+
+        items, next_cursor = await self.repository.list_keyset(
             session=session,
-            page=page,
             size=size,
             filters=filters,
             user_id=user.id,
+            after=after,
         )
 
-        return Page.create(
+        return CursorPage[Book](
             items=items,
-            total=total,
+            size=size,
+            next_cursor=next_cursor.encode() if next_cursor else None,
+        )
+
+    async def list_changes(
+        self, session: AsyncSession, user: User, since: str | None, size: int
+    ) -> BookChanges:
+        try:
+            after = ChangeCursor.decode(since) if since else ChangeCursor()
+        except ValueError as err:
+            raise BadRequestException("Invalid cursor") from err
+
+        books, tombstones, cursor, has_more = await self.repository.changes(
+            session, user_id=user.id, after=after, size=size
+        )
+
+        return BookChanges(
+            books=books,
+            deleted=[
+                {"id": tombstone.book_id, "deleted_at": tombstone.deleted_at}
+                for tombstone in tombstones
+            ],
+            next_cursor=cursor.encode(),
+            has_more=has_more,
+        )
+
+    def export_books(
+        self,
+        session: AsyncSession,
+        filters: BookFilters,
+        user: User,
+        fields: Sequence[str] = READ_FIELDS,
+    ) -> AsyncIterator[Sequence[Row]]:
+        return self.repository.stream(
+            session,
+            filters=filters,
+            user_id=user.id,
+            batch_size=BOOK_EXPORT_BATCH_SIZE,
+            fields=fields,
+        )
+
+    async def search_books(
+        self,
+        session: AsyncSession,
+        query: str,
+        page: int,
+        size: int,
+        user: User,
+    ) -> Page[Book]:
+        items, total, has_next = await self.repository.search(
+            session=session,
+            query=query,
             page=page,
             size=size,
+            user_id=user.id,
         )
 
-    def get_book(self, session: Session, book_id: int, user: User) -> Book:
-        book = self.repository.get_by_id(session, book_id, user_id=user.id)
+        return Page[Book].create(items=items, total=total, page=page, size=size, has_next=has_next)
 
-        if not book:
-            raise NotFoundException("Book not found")
+    async def library_version(self, session: AsyncSession, user: User) -> int:
+        return await self.repository.library_version(session, user_id=user.id)
 
-        return book
+    async def get_book(
+        self,
+        session: AsyncSession,
+        book_id: int,
+        user: User,
+        fields: Sequence[str] = READ_FIELDS,
+    ) -> tuple[int, bytes]:
+        """
+        `version` do livro (base do ETag) e o JSON pronto no formato `BookRead`,
+        só com `fields`. No cache os dois ficam juntos como `<version>\n<json>`.
+        """
+        key = book_key(book_id, fields)
+        cached, generation = self.cache.get(user.id, key)
+        if cached is not None:
+            version, _, content = cached.partition(b"\n")
+            return int(version), content
+
+        async def load() -> tuple[int, bytes]:
+            row = await self.repository.get_row(session, book_id, user_id=user.id, fields=fields)
+
+            if not row:
+                raise NotFoundException("Book not found")
+
+            *values, version = row
+            content = row_json(values, fields)
+            self.cache.set(user.id, key, b"%d\n%b" % (version, content), generation)
+            return version, content
 
-    def update_book(
-        self, session: Session, book_id: int, book_update: BookUpdate, user: User
+        return await self.flights.do(user.id, key, load)
+
+    async def update_book(
+        self, session: AsyncSession, book_id: int, book_update: BookUpdate, user: User
     ) -> Book:
-        book = self.repository.get_by_id(session, book_id, user_id=user.id)
+        book = await self.repository.update(
+            session,
+            book_id,
+            user_id=user.id,
+            values=book_update.model_dump(exclude_unset=True),
+        )
 
         if not book:
             raise NotFoundException("Book not found")
 
-        update_data = book_update.model_dump(exclude_unset=True)
+        self._invalidate(user.id)
+        return book
+
+    async def delete_book(self, session: AsyncSession, book_id: int, user: User) -> None:
+        if not await self.repository.delete(session, book_id, user_id=user.id):
+            raise NotFoundException("Book not found")
+
+        self._invalidate(user.id)
+
+    async def bulk_update_books(
+        self, session: AsyncSession, bulk_update: BulkUpdate, user: User
+    ) -> BulkWriteResult:
+        affected = await self.repository.bulk_update(
+            session,
+            bulk_update,
+            user_id=user.id,
+            values=bulk_update.patch.model_dump(exclude_unset=True),
+        )
+        if affected:
+            self._invalidate(user.id)
+        return BulkWriteResult(affected=affected)
 
-        for key, value in update_data.items():
-            setattr(book, key, value)
+    async def bulk_delete_books(
+        self, session: AsyncSession, selection: BulkSelection, user: User
+    ) -> BulkWriteResult:
+        affected = await self.repository.bulk_delete(session, selection, user_id=user.id)
+        if affected:
+            self._invalidate(user.id)
+        return BulkWriteResult(affected=affected)
 
-        return self.repository.update(session, book)
+    def _invalidate(self, user_id: int) -> None:
+        # Leituras que começarem depois desta escrita não reaproveitam
+        # resultados de antes dela, nem do cache nem de uma execução em curso
+        self.cache.invalidate(user_id)
+        self.flights.forget(user_id)
+        note_write(user_id)
 
-    def delete_book(self, session: Session, book_id: int, user: User) -> None:
-        book = self.repository.get_by_id(session, book_id, user_id=user.id)
+    def _decode_cursor(self, cursor: str, filters: BookFilters) -> BookCursor:
+        try:
+            decoded = BookCursor.decode(cursor)
+        except ValueError as err:
+            raise BadRequestException("Invalid cursor") from err
 
-        if not book:
-            raise NotFoundException("Book not found")
+        if decoded.order_by != filters.order_by or decoded.order != filters.order:
+            raise BadRequestException("Cursor does not match the requested ordering")
 
-        self.repository.delete(session, book)
+        return decoded
@@ -0,0 +1,31 @@
+from sqlalchemy import Connection, event
+from sqlmodel import SQLModel
+
+# Cada escrita em `book` incrementa a versão da biblioteca do dono no mesmo
+# comando, então nenhum caminho de escrita (inclusive em lote) fica de fora.
+_DDL = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS book_library_version_{name} AFTER {operation} ON book BEGIN
+        INSERT INTO library_version (user_id, version) VALUES ({row}.user_id, 1)
+        ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+    END
+    """
+    for name, operation, row in (
+        ("ai", "INSERT", "new"),
+        ("au", "UPDATE", "new"),
+        ("ad", "DELETE", "old"),
+    )
+]
+
+
+def install(connection: Connection) -> None:
+    if connection.dialect.name != "sqlite":
+        return
+    for statement in _DDL:
+        connection.exec_driver_sql(statement)
+
+
+# Depois do create_all inteiro: os triggers dependem de `book` e `library_version`
+@event.listens_for(SQLModel.metadata, "after_create")
+def _create_version_triggers(target, connection, **kw):
+    install(connection)
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import os
+from math import ceil
 
 from dotenv import load_dotenv
 
@@ -10,3 +11,63 @@ SECRET_KEY = os.getenv("SECRET_KEY", "change-me-in-env-please")
 
 JWT_ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
+
+# Total da listagem de livros sem filtros, em cache por usuário
+BOOK_COUNT_CACHE_SIZE = int(os.getenv("BOOK_COUNT_CACHE_SIZE", "10000"))
+BOOK_COUNT_CACHE_TTL_SECONDS = float(os.getenv("BOOK_COUNT_CACHE_TTL_SECONDS", "60"))
+
+# Cache do usuário autenticado (get_current_user)
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "1024"))
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+
+# Workers do servidor (uvicorn/gunicorn) e CPUs que cabem a cada um; pools por
+# processo dividem as CPUs entre eles em vez de cada worker usar todas
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+CPUS_PER_WORKER = ceil((os.cpu_count() or 1) / max(WEB_CONCURRENCY, 1))
+
+# Pool de processos para o hash de senha (Argon2); 0 usa threads do event loop
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(CPUS_PER_WORKER)))
+# Operações de hash aguardando/rodando antes de responder 503
+PASSWORD_HASH_MAX_PENDING = int(
+    os.getenv("PASSWORD_HASH_MAX_PENDING", str(4 * max(PASSWORD_HASH_WORKERS, 1)))
+)
+
+# Cache de tokens JWT já verificados; entradas nunca passam do `exp` do token
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "4096"))
+TOKEN_CACHE_TTL_SECONDS = float(os.getenv("TOKEN_CACHE_TTL_SECONDS", "300"))
+
+# Importação em lote (POST /books/bulk)
+BOOK_BULK_MAX_ITEMS = int(os.getenv("BOOK_BULK_MAX_ITEMS", "10000"))
+BOOK_BULK_CHUNK_SIZE = int(os.getenv("BOOK_BULK_CHUNK_SIZE", "500"))
+
+# Exportação: linhas buscadas do cursor do banco (e enviadas) por vez
+BOOK_EXPORT_BATCH_SIZE = int(os.getenv("BOOK_EXPORT_BATCH_SIZE", "500"))
+
+# Cache de leituras de livros por usuário: "memory" (por processo), "sqlite"
+# (arquivo local compartilhado entre workers) ou "none"
+BOOK_CACHE_BACKEND = os.getenv("BOOK_CACHE_BACKEND", "memory")
+BOOK_CACHE_SIZE = int(os.getenv("BOOK_CACHE_SIZE", "1024"))
+BOOK_CACHE_TTL_SECONDS = float(os.getenv("BOOK_CACHE_TTL_SECONDS", "30"))
+BOOK_CACHE_PATH = os.getenv("BOOK_CACHE_PATH", "./book_cache.db")
+
+# Commits agrupados para create/update de livros: escritas simultâneas esperam
+# até BOOK_WRITE_WINDOW_MS (ou BOOK_WRITE_MAX_BATCH escritas) e dividem um COMMIT.
+# Janela maior junta mais escritas por commit, ao custo de latência.
+BOOK_WRITE_COALESCING = os.getenv("BOOK_WRITE_COALESCING", "false").lower() in ("1", "true")
+BOOK_WRITE_WINDOW_MS = float(os.getenv("BOOK_WRITE_WINDOW_MS", "2"))
+BOOK_WRITE_MAX_BATCH = int(os.getenv("BOOK_WRITE_MAX_BATCH", "64"))
+
+# Instrumentação de SQL por requisição: comandos mais lentos que SLOW_QUERY_MS
+# e comandos repetidos N_PLUS_ONE_THRESHOLD vezes numa mesma requisição (sinal
+# de N+1) são logados com o EXPLAIN QUERY PLAN. 0 desliga cada aviso.
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "10"))
+
+# Profiling sob demanda (desligado por padrão): uma fração PROFILE_SAMPLE_RATE
+# das requisições, ou as que trazem o header X-Profile-Token igual a
+# PROFILE_TOKEN, rodam sob cProfile. Os arquivos .pstats vão para PROFILE_DIR,
+# que guarda no máximo PROFILE_MAX_FILES (os mais antigos são apagados).
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+PROFILE_DIR = os.getenv("PROFILE_DIR", "./profiles")
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "200"))
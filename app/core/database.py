@@ -1,23 +1,265 @@
+import logging
 import os
+from contextvars import ContextVar
+from typing import Any
 
+from sqlalchemy import Engine, event, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 # Importar models para registrar no SQLModel.metadata antes do create_all
+from app.books import versioning
 from app.books.model import Book  # noqa: F401
+from app.books.search import search_index
+from app.core.cache import TTLCache
+from app.core.config import CPUS_PER_WORKER
+from app.core.metrics import TimedQueuePool
+from app.core.migrations import run_migrations
+from app.core.query_stats import instrument_engine
 from app.users.model import User  # noqa: F401
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./library.db")
+# Vazio: conexões somente leitura ao mesmo arquivo SQLite
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL", "")
+# Janela após uma escrita em que as leituras do usuário voltam ao banco principal
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
 
+# PRAGMAs aplicados a cada conexão nova. "production" usa WAL (leitores não
+# esperam o escritor), synchronous=NORMAL (fsync só no checkpoint, seguro com
+# WAL), mmap e cache maiores e espera por lock em vez de falhar na hora.
+# "default" mantém os padrões do SQLite. SQLITE_<PRAGMA> sobrescreve um valor.
+SQLITE_PROFILES: dict[str, dict[str, str]] = {
+    "production": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": str(256 * 1024 * 1024),
+        "cache_size": str(-64 * 1024),  # negativo: KiB
+        "busy_timeout": "5000",  # ms
+    },
+    "default": {},
+}
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "production")
+
+# Pool por worker: cada conexão aiosqlite tem sua thread, então mais conexões
+# que CPUs disponíveis para o worker só aumentam a disputa pelo lock do arquivo
+DATABASE_POOL_SIZE = int(os.getenv("DATABASE_POOL_SIZE", str(max(4, 2 * CPUS_PER_WORKER))))
+DATABASE_MAX_OVERFLOW = int(os.getenv("DATABASE_MAX_OVERFLOW", str(DATABASE_POOL_SIZE)))
+
+logger = logging.getLogger(__name__)
+
+
+def async_database_url(url: str) -> str:
+    """
+    URL do driver assíncrono equivalente (sqlite -> sqlite+aiosqlite).
+    """
+    parsed = make_url(url)
+    if parsed.drivername == "sqlite":
+        parsed = parsed.set(drivername="sqlite+aiosqlite")
+    return parsed.render_as_string(hide_password=False)
+
+
+def read_only_database_url(url: str) -> str:
+    """
+    URL somente leitura (modo URI `mode=ro`) para o mesmo arquivo SQLite.
+    Bancos em memória ou de outros dialetos ficam como estão.
+    """
+    parsed = make_url(url)
+    if not parsed.drivername.startswith("sqlite") or parsed.database in (None, "", ":memory:"):
+        return url
+    if parsed.query.get("uri") == "true":
+        return url
+
+    parsed = parsed.set(database=f"file:{parsed.database}", query={"mode": "ro", "uri": "true"})
+    return parsed.render_as_string(hide_password=False)
+
+
+def sqlite_pragmas(profile: str = SQLITE_PROFILE) -> dict[str, str]:
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(f"Unknown SQLite profile: {profile!r}")
+
+    pragmas = dict(SQLITE_PROFILES[profile])
+    for name in SQLITE_PROFILES["production"]:
+        if value := os.getenv(f"SQLITE_{name.upper()}"):
+            pragmas[name] = value
+    return pragmas
+
+
+def apply_sqlite_pragmas(engine: Engine, pragmas: dict[str, str], *, read_only: bool = False):
+    """
+    Aplica os PRAGMAs em toda conexão que o engine abrir. Em conexões
+    somente leitura o journal_mode fica de fora: quem define é o escritor,
+    e o modo WAL fica gravado no arquivo.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+
+    statements = [
+        f"PRAGMA {name} = {value}"
+        for name, value in pragmas.items()
+        if not (read_only and name == "journal_mode")
+    ]
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for statement in statements:
+            cursor.execute(statement)
+        cursor.close()
+
+
+def _pool_options(url: str, name: str) -> dict[str, Any]:
+    # Banco em memória usa StaticPool, que não aceita tamanho
+    if make_url(url).database in (None, "", ":memory:"):
+        return {}
+    return {
+        # o pool padrão, medindo a espera por conexão (rótulo `pool` em /metrics)
+        "poolclass": TimedQueuePool,
+        "pool_logging_name": name,
+        "pool_size": DATABASE_POOL_SIZE,
+        "max_overflow": DATABASE_MAX_OVERFLOW,
+    }
+
+
+# Engine síncrona: criação de tabelas, migrações e scripts
 engine = create_engine(
     DATABASE_URL,
     echo=False,  # mude para True se quiser ver SQL no console
 )
 
+# Engine assíncrona: usada pelas rotas
+async_engine = create_async_engine(
+    async_database_url(DATABASE_URL),
+    echo=False,
+    **_pool_options(DATABASE_URL, "write"),
+)
+
+
+# Engine de leitura: réplica (DATABASE_READ_URL) ou o mesmo arquivo em modo ro
+read_engine = create_async_engine(
+    async_database_url(DATABASE_READ_URL or read_only_database_url(DATABASE_URL)),
+    echo=False,
+    **_pool_options(DATABASE_READ_URL or DATABASE_URL, "read"),
+)
+
+apply_sqlite_pragmas(engine, sqlite_pragmas())
+apply_sqlite_pragmas(async_engine.sync_engine, sqlite_pragmas())
+apply_sqlite_pragmas(read_engine.sync_engine, sqlite_pragmas(), read_only=True)
+# Contagem e tempo de SQL por requisição (Server-Timing, log de comandos lentos)
+instrument_engine(async_engine.sync_engine)
+instrument_engine(read_engine.sync_engine)
+
+
+def dedicated_write_engine() -> AsyncEngine:
+    """
+    Engine de uma conexão só para quem serializa as próprias transações (commits
+    agrupados). Fora do pool das rotas: uma requisição que segura uma conexão
+    enquanto espera o lote não impede o lote de conseguir a sua.
+    """
+    options = _pool_options(DATABASE_URL, "batch")
+    if not options:
+        # Banco em memória só existe na conexão compartilhada
+        return async_engine
+
+    dedicated = create_async_engine(
+        async_database_url(DATABASE_URL),
+        echo=False,
+        **{**options, "pool_size": 1, "max_overflow": 0},
+    )
+    apply_sqlite_pragmas(dedicated.sync_engine, sqlite_pragmas())
+    instrument_engine(dedicated.sync_engine)
+    return dedicated
+
+
+# Usuário da requisição atual, definido por get_current_user
+current_user_id: ContextVar[int | None] = ContextVar("current_user_id", default=None)
+
+# Usuários que escreveram há pouco; o valor é irrelevante, só a presença
+recent_writers = TTLCache(maxsize=100_000, ttl=READ_YOUR_WRITES_SECONDS)
+
+
+def note_write(user_id: int) -> None:
+    recent_writers.set(user_id, True)
+
+
+def wrote_recently(user_id: int) -> bool:
+    return recent_writers.get(user_id) is not None
+
+
+class ReadRoutingSession(Session):
+    """
+    Sessão das rotas de leitura: usa o engine de leitura, exceto para um
+    usuário que escreveu nos últimos READ_YOUR_WRITES_SECONDS, que lê do
+    principal e não corre o risco de não ver a própria escrita numa réplica.
+
+    A escolha é feita a cada comando, então vale mesmo que a sessão tenha
+    sido criada antes de get_current_user identificar o usuário.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        user_id = current_user_id.get()
+        if user_id is not None and wrote_recently(user_id):
+            return self.info["write_engine"].sync_engine
+        return super().get_bind(mapper, clause=clause, **kw)
+
+
+def read_session(engine: AsyncEngine, write_engine: AsyncEngine) -> AsyncSession:
+    return AsyncSession(
+        engine,
+        sync_session_class=ReadRoutingSession,
+        info={"write_engine": write_engine},
+        expire_on_commit=False,
+    )
+
 
 def create_db_and_tables():
-    SQLModel.metadata.create_all(engine)
+    with engine.connect() as connection:
+        # Com vários workers subindo juntos, o lock de escrita faz um esperar
+        # o outro terminar em vez de ambos tentarem criar as mesmas tabelas
+        if engine.dialect.name == "sqlite":
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+        SQLModel.metadata.create_all(connection)
+
+        # create_all não altera tabelas que já existiam
+        run_migrations(connection)
+        search_index.install(connection)
+        versioning.install(connection)
+        connection.commit()
+
+    log_database_settings()
+
+
+def database_settings() -> dict[str, str | int]:
+    """
+    Valores efetivos, lidos de volta do SQLite (um PRAGMA inválido é
+    ignorado por ele em silêncio) e o tamanho dos pools.
+    """
+    settings: dict[str, str | int] = {"profile": SQLITE_PROFILE}
+
+    if engine.dialect.name == "sqlite":
+        with engine.connect() as connection:
+            for name in SQLITE_PROFILES["production"]:
+                settings[name] = connection.exec_driver_sql(f"PRAGMA {name}").scalar_one()
+
+    settings["pool_size"] = DATABASE_POOL_SIZE
+    settings["max_overflow"] = DATABASE_MAX_OVERFLOW
+    return settings
+
+
+def log_database_settings() -> None:
+    settings = database_settings()
+    logger.info("Database: %s", ", ".join(f"{key}={value}" for key, value in settings.items()))
+
+
+async def get_session():
+    # expire_on_commit=False: atributos continuam acessíveis depois do commit
+    # sem um refresh implícito (que exigiria I/O fora de um await)
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
 
 
-def get_session():
-    with Session(engine) as session:
+async def get_read_session():
+    # Para rotas que só leem (GET); escritas continuam em get_session
+    async with read_session(read_engine, async_engine) as session:
         yield session
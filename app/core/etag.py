@@ -0,0 +1,23 @@
+import hashlib
+import json
+from typing import Any
+
+
+def weak_etag(*parts: Any) -> str:
+    """
+    ETag fraco a partir de valores JSON-serializáveis (versões, parâmetros
+    da consulta). O mesmo conteúdo sempre gera o mesmo ETag.
+    """
+    raw = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+    return f'W/"{hashlib.sha256(raw.encode()).hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    # Comparação fraca (RFC 9110): o prefixo W/ é ignorado dos dois lados
+    if not if_none_match:
+        return False
+
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    return "*" in candidates or etag.removeprefix("W/") in {
+        value.removeprefix("W/") for value in candidates
+    }
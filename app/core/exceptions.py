@@ -17,3 +17,13 @@ class AppException(Exception):
 class NotFoundException(AppException):
     status_code = HTTPStatus.NOT_FOUND
     title = "Not found"
+
+
+class BadRequestException(AppException):
+    status_code = HTTPStatus.BAD_REQUEST
+    title = "Bad request"
+
+
+class ServiceUnavailableException(AppException):
+    status_code = HTTPStatus.SERVICE_UNAVAILABLE
+    title = "Service unavailable"
@@ -0,0 +1,214 @@
+"""
+Métricas no formato texto do Prometheus, sem dependências externas.
+
+Os valores vivem na memória do processo: com vários workers, cada um expõe
+os próprios números. Tudo roda na thread do event loop, então as
+atualizações são operações simples em dicionários, sem lock.
+"""
+
+from __future__ import annotations
+
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Mapping
+from typing import Any
+
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Os mesmos limites padrão dos clientes oficiais do Prometheus
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+POOL_WAIT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Requisições que não casaram com nenhuma rota: um só rótulo, para que
+# caminhos arbitrários (404) não criem séries novas
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def _labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values, strict=True)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.values: dict[tuple, float] = {}
+
+    def inc(self, *labels: Any, amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in self.values.items():
+            lines.append(f"{self.name}{_labels(self.labels, labels)} {value}")
+        return lines
+
+
+class Gauge(Counter):
+    def dec(self, *labels: Any, amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) - amount
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    """
+    Contagens por faixa guardadas sem acumular; o acumulado que o formato
+    exige é calculado só na hora de exportar.
+    """
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        # por rótulo: [contagem por faixa..., +Inf], soma
+        self.values: dict[tuple, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, *labels: Any) -> None:
+        series = self.values.get(labels)
+        if series is None:
+            series = self.values[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+        counts, total = series
+        counts[bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+
+        for labels, (counts, total) in self.values.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts, strict=True):
+                cumulative += count
+                le = _labels(self.labels, labels, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+
+            suffix = _labels(self.labels, labels)
+            lines.append(f"{self.name}_sum{suffix} {total[0]}")
+            lines.append(f"{self.name}_count{suffix} {cumulative}")
+
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: list[Counter | Histogram] = []
+        self._stats: dict[str, Callable[[], Mapping[str, Any]]] = {}
+
+    def register[M: Counter | Histogram](self, metric: M) -> M:
+        self._metrics.append(metric)
+        return metric
+
+    def register_stats(self, prefix: str, stats: Callable[[], Mapping[str, Any]]) -> None:
+        """
+        Expõe o `stats()` de um componente (caches, single-flight...) como
+        gauges `<prefix>_<chave>`, lidos só no momento da coleta. Valores não
+        numéricos (como o nome do backend) ficam de fora.
+        """
+        self._stats[prefix] = stats
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+
+        for prefix, stats in self._stats.items():
+            for key, value in stats().items():
+                if isinstance(value, bool) or not isinstance(value, int | float):
+                    continue
+                lines.append(f"# TYPE {prefix}_{key} gauge")
+                lines.append(f"{prefix}_{key} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_requests = registry.register(
+    Counter("http_requests_total", "Requests by route and status", ("method", "route", "status"))
+)
+http_duration = registry.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "Request latency until the last body byte, by route",
+        ("method", "route"),
+    )
+)
+http_in_progress = registry.register(
+    Gauge("http_requests_in_progress", "Requests being served", ("method",))
+)
+pool_wait = registry.register(
+    Histogram(
+        "db_pool_checkout_wait_seconds",
+        "Time waiting for a database connection from the pool",
+        ("pool",),
+        buckets=POOL_WAIT_BUCKETS,
+    )
+)
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI puro: mede cada requisição HTTP e a registra com o
+    caminho da rota (`/books/{book_id}`), não o caminho pedido.
+
+    A rota só é conhecida depois do roteamento; o Starlette a grava no
+    próprio `scope`, que é lido quando a requisição termina. Por isso o gauge
+    de requisições em andamento é por método.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_in_progress.inc(method)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_in_progress.dec(method)
+
+            route = scope.get("route")
+            path = route.path if route is not None else UNMATCHED_ROUTE
+            http_duration.observe(elapsed, method, path)
+            http_requests.inc(method, path, status)
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Pool assíncrono padrão que mede a espera por uma conexão livre.
+
+    O rótulo `pool` vem de `pool_logging_name` na criação da engine.
+    """
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            name = getattr(self, "logging_name", None) or "default"
+            pool_wait.observe(time.perf_counter() - started, name)
@@ -0,0 +1,65 @@
+"""
+Migrações leves para bancos SQLite que já existiam.
+
+`create_all` só cria tabelas novas; colunas e índices adicionados depois a uma
+tabela existente precisam de um passo aqui. A versão aplicada fica em
+`PRAGMA user_version`, e cada passo deve ser idempotente, porque em um banco
+novo ele roda logo depois do `create_all` que já criou tudo.
+"""
+
+from collections.abc import Callable
+
+from sqlalchemy import Connection, inspect
+
+from app.books.model import Book
+
+# Colunas criadas por passos posteriores; os índices delas vêm nesses passos
+_LATER_COLUMNS = {"change_seq"}
+
+
+def _book_sort_indexes(connection: Connection) -> None:
+    for index in Book.__table__.indexes:
+        if _LATER_COLUMNS.isdisjoint(index.columns.keys()):
+            index.create(connection, checkfirst=True)
+
+
+def _book_version(connection: Connection) -> None:
+    columns = {column["name"] for column in inspect(connection).get_columns("book")}
+    if "version" not in columns:
+        connection.exec_driver_sql("ALTER TABLE book ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+
+
+def _book_change_seq(connection: Connection) -> None:
+    # Livros existentes ficam em 0: entram na primeira sincronização de cada cliente
+    columns = {column["name"] for column in inspect(connection).get_columns("book")}
+    if "change_seq" not in columns:
+        connection.exec_driver_sql(
+            "ALTER TABLE book ADD COLUMN change_seq INTEGER NOT NULL DEFAULT 0"
+        )
+    for index in Book.__table__.indexes:
+        if "change_seq" in index.columns.keys():
+            index.create(connection, checkfirst=True)
+
+
+MIGRATIONS: list[Callable[[Connection], None]] = [
+    _book_sort_indexes,
+    _book_version,
+    _book_change_seq,
+]
+
+
+def current_version(connection: Connection) -> int:
+    return connection.exec_driver_sql("PRAGMA user_version").scalar_one()
+
+
+def run_migrations(connection: Connection) -> int:
+    version = current_version(connection)
+
+    for target, migration in enumerate(MIGRATIONS, start=1):
+        if target <= version:
+            continue
+        migration(connection)
+        connection.exec_driver_sql(f"PRAGMA user_version = {target}")
+        version = target
+
+    return version
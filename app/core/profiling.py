@@ -0,0 +1,110 @@
+"""
+Profiling de requisições sob demanda, com cProfile.
+
+O profiler envolve a aplicação inteira abaixo do middleware: resolução das
+dependências (`get_current_user`, `get_session`), a chamada ao serviço e a
+serialização da resposta. Cada captura vira um arquivo `.pstats` em
+`PROFILE_DIR/<método>-<rota>/`, legível com `python -m pstats` ou snakeviz.
+
+Limitações: o cProfile mede a thread do event loop inteira, então outras
+requisições que rodarem ao mesmo tempo aparecem na captura; código em
+threads (rotas síncronas, hash de senha) fica de fora. Só uma requisição é
+medida por vez, e as demais seguem sem profiling.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import hmac
+import logging
+import random
+import re
+import time
+from pathlib import Path
+from threading import Lock
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import (
+    PROFILE_DIR,
+    PROFILE_MAX_FILES,
+    PROFILE_SAMPLE_RATE,
+    PROFILE_TOKEN,
+)
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "x-profile-token"
+
+
+def _route_slug(scope: Scope) -> str:
+    route = scope.get("route")
+    path = route.path if route is not None else "unmatched"
+    return re.sub(r"[^A-Za-z0-9_]+", "-", f"{scope['method']}-{path}").strip("-")
+
+
+def _save(profiler: cProfile.Profile, path: Path, directory: Path, max_files: int) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    profiler.dump_stats(path)
+
+    # Limite global do diretório: remove os mais antigos de qualquer rota
+    files = sorted(directory.glob("*/*.pstats"), key=lambda file: file.stat().st_mtime)
+    for old in files[: max(len(files) - max_files, 0)]:
+        old.unlink(missing_ok=True)
+
+
+class ProfilingMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        # cProfile é um só por processo; quem não pega o lock segue sem profiling
+        self._lock = Lock()
+
+    def _wanted(self, scope: Scope) -> bool:
+        if PROFILE_TOKEN:
+            token = Headers(scope=scope).get(PROFILE_HEADER)
+            if token is not None and hmac.compare_digest(token, PROFILE_TOKEN):
+                return True
+        return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or not (PROFILE_SAMPLE_RATE or PROFILE_TOKEN)
+            or not self._wanted(scope)
+            or not self._lock.acquire(blocking=False)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        name = f"{time.strftime('%Y%m%dT%H%M%S')}-{time.perf_counter_ns() % 10**9:09d}.pstats"
+
+        async def send_with_name(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("X-Profile", name)
+            await send(message)
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Outra ferramenta (debugger, profiler externo) já mede o processo
+            self._lock.release()
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send_with_name)
+        finally:
+            profiler.disable()
+            self._lock.release()
+
+        directory = Path(PROFILE_DIR)
+        path = directory / _route_slug(scope) / name
+        try:
+            await asyncio.to_thread(_save, profiler, path, directory, PROFILE_MAX_FILES)
+        except OSError:
+            logger.exception("could not write profile %s", path)
+        else:
+            logger.info("profile written to %s", path)
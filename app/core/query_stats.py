@@ -0,0 +1,132 @@
+"""
+Quantos comandos SQL cada requisição executou e quanto tempo passou no banco.
+
+Os hooks `before/after_cursor_execute` das engines somam em um `QueryStats`
+guardado numa contextvar. O middleware cria um por requisição; o código
+síncrono do SQLAlchemy roda num greenlet que herda o contexto da task, então
+os hooks enxergam o objeto da requisição que disparou o comando.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from sqlalchemy import Engine, event
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import N_PLUS_ONE_THRESHOLD, SLOW_QUERY_MS
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: Counter[str] = Counter()
+
+    def server_timing(self, total_seconds: float) -> str:
+        return (
+            f'db;dur={self.seconds * 1000:.2f};desc="{self.count} queries", '
+            f"total;dur={total_seconds * 1000:.2f}"
+        )
+
+
+# Fora de uma requisição (startup, scripts, lotes de escrita) fica None
+current_query_stats: ContextVar[QueryStats | None] = ContextVar("current_query_stats", default=None)
+
+
+def _query_plan(connection, statement: str, parameters) -> str:
+    if connection.dialect.name != "sqlite":
+        return ""
+    # Cursor do driver direto, para o EXPLAIN não passar pelos próprios hooks
+    cursor = connection.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        return "\n".join(f"  {row[-1]}" for row in cursor.fetchall())
+    except Exception as err:  # o plano é só diagnóstico
+        return f"  (no plan: {err})"
+    finally:
+        cursor.close()
+
+
+def instrument_engine(engine: Engine) -> None:
+    # O início fica no contexto de execução do próprio comando: se ele falhar,
+    # o `after` não roda e nada sobra na conexão
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(connection, cursor, statement, parameters, context, executemany):
+        context.query_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(connection, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context.query_started
+
+        stats = current_query_stats.get()
+        if stats is None:
+            return
+
+        stats.count += 1
+        stats.seconds += elapsed
+        stats.statements[statement] += 1
+
+        repeated = stats.statements[statement] == N_PLUS_ONE_THRESHOLD
+        slow = SLOW_QUERY_MS and elapsed * 1000 >= SLOW_QUERY_MS
+        if not (repeated or slow) or executemany:
+            return
+
+        reason = (
+            f"slow query ({elapsed * 1000:.1f} ms)"
+            if slow
+            else f"possible N+1 ({N_PLUS_ONE_THRESHOLD} runs in one request)"
+        )
+        plan = _query_plan(connection, statement, parameters)
+        logger.warning("%s: %s\n%s", reason, " ".join(statement.split()), plan)
+
+
+class QueryStatsMiddleware:
+    """
+    Mede o SQL de cada requisição HTTP: devolve `Server-Timing` (banco e total
+    até o início da resposta) e loga uma linha `key=value` ao terminar.
+    Comandos executados depois do início da resposta (exportação em stream)
+    entram no log, mas não no header.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = current_query_stats.set(stats)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", stats.server_timing(time.perf_counter() - started))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_query_stats.reset(token)
+            route = scope.get("route")
+            logger.info(
+                "request method=%s route=%s status=%s queries=%d db_ms=%.2f total_ms=%.2f",
+                scope["method"],
+                route.path if route is not None else scope["path"],
+                status,
+                stats.count,
+                stats.seconds * 1000,
+                (time.perf_counter() - started) * 1000,
+            )
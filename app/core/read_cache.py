@@ -0,0 +1,232 @@
+"""
+Cache de leituras por usuário, com backends plugáveis.
+
+Cada usuário tem uma geração: `invalidate` a incrementa e as entradas antigas
+deixam de ser encontradas. `get` devolve a geração vista na leitura, e `set`
+só grava se ela ainda é a atual, então uma leitura que correu junto com uma
+escrita nunca deixa um valor velho no cache.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import time
+from threading import Lock
+from typing import Protocol
+
+from app.core.cache import TTLCache
+
+
+class ReadCache(Protocol):
+    def get(self, user_id: int, key: str) -> tuple[bytes | None, int]: ...
+
+    def set(self, user_id: int, key: str, value: bytes, generation: int) -> None: ...
+
+    def invalidate(self, user_id: int) -> None: ...
+
+    def clear(self) -> None: ...
+
+    def stats(self) -> dict[str, int | float | str]: ...
+
+
+def _hit_rate(hits: int, misses: int) -> float:
+    return hits / (hits + misses) if hits + misses else 0.0
+
+
+class NullReadCache:
+    """Cache desligado: toda leitura vai ao banco."""
+
+    def get(self, user_id: int, key: str) -> tuple[bytes | None, int]:
+        return None, 0
+
+    def set(self, user_id: int, key: str, value: bytes, generation: int) -> None:
+        pass
+
+    def invalidate(self, user_id: int) -> None:
+        pass
+
+    def clear(self) -> None:
+        pass
+
+    def stats(self) -> dict[str, int | float | str]:
+        return {"backend": "none"}
+
+
+class MemoryReadCache:
+    """
+    LRU em memória do processo, limitado em itens e TTL.
+
+    Com vários workers cada um tem o seu cache e só vê as próprias
+    invalidações; para compartilhar entre workers use `SQLiteReadCache`.
+    """
+
+    def __init__(self, *, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = Lock()
+        self._generations: dict[int, int] = {}
+
+    def get(self, user_id: int, key: str) -> tuple[bytes | None, int]:
+        generation = self._generations.get(user_id, 0)
+        return self._cache.get((user_id, generation, key)), generation
+
+    def set(self, user_id: int, key: str, value: bytes, generation: int) -> None:
+        # Chave com geração antiga nunca mais é lida; o LRU a descarta
+        if self._generations.get(user_id, 0) == generation:
+            self._cache.set((user_id, generation, key), value)
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self._generations.clear()
+
+    def stats(self) -> dict[str, int | float | str]:
+        stats = self._cache.stats()
+        return {
+            "backend": "memory",
+            **stats,
+            "hit_rate": _hit_rate(stats["hits"], stats["misses"]),
+            "bytes": sum(len(value) for value in self._cache.values()),
+        }
+
+
+class SQLiteReadCache:
+    """
+    Cache em um arquivo SQLite local, compartilhado pelos workers da máquina.
+
+    As operações são consultas por chave primária em um arquivo local, curtas
+    o bastante para rodar direto no event loop.
+    """
+
+    def __init__(self, path: str, *, maxsize: int, ttl: float):
+        self.path = path
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = Lock()
+
+        self._connection = sqlite3.connect(
+            path, timeout=5, isolation_level=None, check_same_thread=False
+        )
+        self._connection.executescript(
+            """
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            CREATE TABLE IF NOT EXISTS read_cache_generation (
+                user_id INTEGER PRIMARY KEY,
+                generation INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS read_cache_entry (
+                user_id INTEGER NOT NULL,
+                key TEXT NOT NULL,
+                value BLOB NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (user_id, key)
+            );
+            CREATE INDEX IF NOT EXISTS ix_read_cache_entry_expires_at
+                ON read_cache_entry (expires_at);
+            """
+        )
+
+    def get(self, user_id: int, key: str) -> tuple[bytes | None, int]:
+        with self._lock:
+            generation = self._generation(user_id)
+            row = self._connection.execute(
+                "SELECT value FROM read_cache_entry"
+                " WHERE user_id = ? AND key = ? AND expires_at > ?",
+                (user_id, key, time.time()),
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None, generation
+
+            self.hits += 1
+            return row[0], generation
+
+    def set(self, user_id: int, key: str, value: bytes, generation: int) -> None:
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+
+        with self._lock, self._connection:
+            self._connection.execute("BEGIN IMMEDIATE")
+            # Outro worker pode ter invalidado depois da leitura
+            if self._generation(user_id) != generation:
+                return
+
+            now = time.time()
+            self._connection.execute(
+                "INSERT OR REPLACE INTO read_cache_entry VALUES (?, ?, ?, ?)",
+                (user_id, key, value, now + self.ttl),
+            )
+            self._evict(now)
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock, self._connection:
+            self._connection.execute("BEGIN IMMEDIATE")
+            self._connection.execute(
+                "INSERT INTO read_cache_generation VALUES (?, 1)"
+                " ON CONFLICT (user_id) DO UPDATE SET generation = generation + 1",
+                (user_id,),
+            )
+            self._connection.execute("DELETE FROM read_cache_entry WHERE user_id = ?", (user_id,))
+
+    def clear(self) -> None:
+        with self._lock, self._connection:
+            self._connection.execute("BEGIN IMMEDIATE")
+            self._connection.execute("DELETE FROM read_cache_entry")
+            self._connection.execute("DELETE FROM read_cache_generation")
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict[str, int | float | str]:
+        with self._lock:
+            size, nbytes = self._connection.execute(
+                "SELECT count(*), coalesce(sum(length(value)), 0) FROM read_cache_entry"
+            ).fetchone()
+
+        return {
+            "backend": "sqlite",
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": size,
+            "maxsize": self.maxsize,
+            "hit_rate": _hit_rate(self.hits, self.misses),
+            "bytes": nbytes,
+        }
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def _generation(self, user_id: int) -> int:
+        row = self._connection.execute(
+            "SELECT generation FROM read_cache_generation WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def _evict(self, now: float) -> None:
+        self._connection.execute("DELETE FROM read_cache_entry WHERE expires_at <= ?", (now,))
+        # Acima do limite, saem as entradas mais perto de expirar
+        self._connection.execute(
+            """
+            DELETE FROM read_cache_entry WHERE rowid IN (
+                SELECT rowid FROM read_cache_entry ORDER BY expires_at
+                LIMIT max((SELECT count(*) FROM read_cache_entry) - ?, 0)
+            )
+            """,
+            (self.maxsize,),
+        )
+
+
+def create_read_cache(backend: str, *, maxsize: int, ttl: float, path: str) -> ReadCache:
+    if backend == "memory":
+        return MemoryReadCache(maxsize=maxsize, ttl=ttl)
+    if backend == "sqlite":
+        return SQLiteReadCache(path, maxsize=maxsize, ttl=ttl)
+    if backend == "none":
+        return NullReadCache()
+    raise ValueError(f"Unknown read cache backend: {backend!r}")
@@ -0,0 +1,31 @@
+"""
+Resposta JSON com serialização em código nativo.
+
+Usa o orjson quando instalado; senão, o serializador do pydantic-core, que
+já vem com o FastAPI. Conteúdo em `bytes` é tratado como JSON pronto e vai
+para o corpo sem passar por nenhum dos dois.
+"""
+
+from typing import Any
+
+from pydantic_core import to_json, to_jsonable_python
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # opcional
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        # Modelos pydantic, datas e enums que o orjson não conhece
+        return orjson.dumps(content, default=to_jsonable_python)
+    return to_json(content)
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
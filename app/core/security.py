@@ -1,12 +1,28 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import multiprocessing
+import time
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor
 from datetime import UTC, datetime, timedelta
 from typing import Any
 
 import jwt
 from pwdlib import PasswordHash
 
-from app.core.config import ACCESS_TOKEN_EXPIRE_MINUTES, JWT_ALGORITHM, SECRET_KEY
+from app.core.cache import TTLCache
+from app.core.config import (
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    JWT_ALGORITHM,
+    PASSWORD_HASH_MAX_PENDING,
+    PASSWORD_HASH_WORKERS,
+    SECRET_KEY,
+    TOKEN_CACHE_SIZE,
+    TOKEN_CACHE_TTL_SECONDS,
+)
+from app.core.exceptions import ServiceUnavailableException
 
 password_hash = PasswordHash.recommended()
 
@@ -19,6 +35,66 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return password_hash.verify(plain_password, hashed_password)
 
 
+class PasswordHasherPool:
+    """
+    Executa o Argon2 fora do event loop, em um pool de processos.
+
+    O hash é CPU-bound e segura o GIL; em threads, uma rajada de logins
+    disputa CPU com todas as outras rotas. Em processos separados, o event
+    loop segue livre. `max_pending` limita quantas operações podem estar na
+    fila ou rodando: acima disso a requisição falha na hora com 503 em vez de
+    acumular latência. Com `workers=0` usa o executor padrão de threads.
+    """
+
+    def __init__(self, *, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor: Executor | None = None
+
+    def _get_executor(self) -> Executor | None:
+        if self.workers > 0 and self._executor is None:
+            # fork() a partir de um processo com threads (event loop, aiosqlite) pode travar
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context(
+                "forkserver" if "forkserver" in methods else "spawn"
+            )
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+        return self._executor
+
+    async def run(self, function, *args):
+        if self.pending >= self.max_pending:
+            raise ServiceUnavailableException(
+                "Too many password operations in progress, retry later"
+            )
+
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), function, *args)
+        finally:
+            self.pending -= 1
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasherPool(
+    workers=PASSWORD_HASH_WORKERS,
+    max_pending=PASSWORD_HASH_MAX_PENDING,
+)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await password_hasher.run(get_password_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await password_hasher.run(verify_password, plain_password, hashed_password)
+
+
 def create_access_token(subject: str, expires_minutes: int | None = None) -> str:
     """
     subject: identificador do usuário (recomendado: user_id como string)
@@ -38,3 +114,87 @@ def decode_access_token(token: str) -> dict[str, Any]:
     InvalidTokenError para token inválido.
     """
     return jwt.decode(token, SECRET_KEY, algorithms=[JWT_ALGORITHM])
+
+
+# Recebe (hit, segundos): no hit, o tempo economizado estimado; no miss, o
+# tempo gasto verificando o token.
+TokenCacheHook = Callable[[bool, float], None]
+
+
+class AccessTokenCache:
+    """
+    Payloads de tokens já verificados, pela digest SHA-256 do token.
+
+    Cada entrada expira no máximo no `exp` do token, e o `exp` é conferido de
+    novo a cada hit: um token vencido nunca sai do cache e sempre passa pelo
+    `jwt.decode`, que levanta ExpiredSignatureError.
+    """
+
+    def __init__(self, *, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._hooks: list[TokenCacheHook] = []
+        self.decodes = 0
+        self.decode_seconds = 0.0
+        self.saved_seconds = 0.0
+
+    def add_hook(self, hook: TokenCacheHook) -> None:
+        self._hooks.append(hook)
+
+    def remove_hook(self, hook: TokenCacheHook) -> None:
+        self._hooks.remove(hook)
+
+    def decode(self, token: str) -> dict[str, Any]:
+        key = hashlib.sha256(token.encode()).digest()
+        now = time.time()
+
+        payload = self._cache.get(key)
+        if payload is not None and payload["exp"] > now:
+            # estimativa: custo médio de uma verificação completa
+            saved = self.decode_seconds / max(self.decodes, 1)
+            self.saved_seconds += saved
+            self._emit(True, saved)
+            return payload
+
+        started = time.perf_counter()
+        payload = decode_access_token(token)
+        elapsed = time.perf_counter() - started
+
+        self.decodes += 1
+        self.decode_seconds += elapsed
+        self._emit(False, elapsed)
+
+        exp = payload.get("exp")
+        if isinstance(exp, int | float):
+            self._cache.set(key, payload, ttl=exp - now)
+
+        return payload
+
+    def stats(self) -> dict[str, float]:
+        stats = self._cache.stats()
+        lookups = stats["hits"] + stats["misses"]
+        return {
+            **stats,
+            "hit_rate": stats["hits"] / lookups if lookups else 0.0,
+            "decode_seconds": self.decode_seconds,
+            "saved_seconds": self.saved_seconds,
+        }
+
+    def clear(self) -> None:
+        self._cache.clear()
+        self.decodes = 0
+        self.decode_seconds = 0.0
+        self.saved_seconds = 0.0
+
+    def _emit(self, hit: bool, seconds: float) -> None:
+        for hook in self._hooks:
+            hook(hit, seconds)
+
+
+token_cache = AccessTokenCache(maxsize=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL_SECONDS)
+
+
+def decode_access_token_cached(token: str) -> dict[str, Any]:
+    """
+    Igual a decode_access_token, reaproveitando tokens já verificados.
+    """
+    return token_cache.decode(token)
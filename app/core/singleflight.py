@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+
+class SingleFlight:
+    """
+    Junta chamadas idênticas e simultâneas em uma única execução.
+
+    A primeira chamada de uma chave (a líder) executa `fn`; as que chegam
+    enquanto ela roda aguardam e recebem o mesmo resultado, ou a mesma
+    exceção. Só coalesce dentro de um processo e de um event loop.
+    """
+
+    def __init__(self):
+        self._calls: dict[tuple[Hashable, Hashable], asyncio.Future] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do[T](self, group: Hashable, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        call_key = (group, key)
+
+        while (future := self._calls.get(call_key)) is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # A líder foi cancelada (cliente desconectou): tenta de novo,
+                # a não ser que o cancelamento seja desta própria chamada
+                if not future.cancelled() or asyncio.current_task().cancelling():
+                    raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[call_key] = future
+        self.executions += 1
+
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as err:
+            future.set_exception(err)
+            # Ninguém aguardando: evita o aviso de exceção nunca lida
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            if self._calls.get(call_key) is future:
+                del self._calls[call_key]
+
+    def forget(self, group: Hashable) -> None:
+        """
+        Chamadas do grupo que chegarem depois disto não se juntam às que já
+        estão em andamento, que podem ter lido o banco antes de uma escrita.
+        """
+        for call_key in [call_key for call_key in self._calls if call_key[0] == group]:
+            del self._calls[call_key]
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._calls),
+        }
+
+    def reset(self) -> None:
+        self.executions = 0
+        self.coalesced = 0
@@ -0,0 +1,120 @@
+"""
+Commits agrupados: escritas de requisições simultâneas dividem uma transação.
+
+Cada escrita chega como uma função `fn(session)` que não faz commit. Elas
+esperam até `window` segundos (ou até juntar `max_batch`) e então rodam em
+sequência numa mesma transação, cada uma dentro do seu SAVEPOINT: uma escrita
+que falha desfaz só o próprio savepoint e devolve o erro à sua requisição,
+enquanto as demais seguem para o único COMMIT do lote.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+type WriteFn[T] = Callable[[AsyncSession], Awaitable[T]]
+
+
+class WriteCoalescer:
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        *,
+        window: float,
+        max_batch: int,
+    ):
+        self.window = window
+        self.max_batch = max_batch
+        self.batches = 0
+        self.writes = 0
+        self._session_factory = session_factory
+        self._pending: list[tuple[WriteFn, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._flushes: set[asyncio.Task] = set()
+        # Um lote por vez: enquanto um faz commit, o próximo vai se formando
+        self._lock = asyncio.Lock()
+
+    async def submit[T](self, fn: WriteFn[T]) -> T:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((fn, future))
+
+        if len(self._pending) >= self.max_batch:
+            self._start_flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._start_flush)
+
+        return await future
+
+    async def close(self) -> None:
+        self._start_flush()
+        await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "writes": self.writes,
+            "mean_batch_size": self.writes / self.batches if self.batches else 0.0,
+            "pending": len(self._pending),
+        }
+
+    def _start_flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if batch:
+            # Contexto vazio: o lote não pertence à requisição que disparou o
+            # flush (nem às métricas de SQL dela)
+            task = asyncio.create_task(self._flush(batch), context=contextvars.Context())
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch: list[tuple[WriteFn, asyncio.Future]]) -> None:
+        async with self._lock:
+            # Requisição cancelada antes do lote começar: a escrita não acontece
+            batch = [(fn, future) for fn, future in batch if not future.done()]
+            if not batch:
+                return
+
+            outcomes: list[tuple[asyncio.Future, Any, BaseException | None]] = []
+
+            try:
+                async with self._session_factory() as session:
+                    connection = await session.connection()
+                    if connection.dialect.name == "sqlite":
+                        # Sem um BEGIN explícito o pysqlite só abre a transação no
+                        # primeiro INSERT, e liberar o primeiro SAVEPOINT já faria commit
+                        await connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+                    for fn, future in batch:
+                        try:
+                            async with session.begin_nested():
+                                outcomes.append((future, await fn(session), None))
+                        except Exception as err:
+                            outcomes.append((future, None, err))
+
+                    await session.commit()
+            except Exception as err:
+                # Sem commit nenhuma escrita do lote valeu
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(err)
+                return
+
+            self.batches += 1
+            self.writes += len(batch)
+
+            for future, result, error in outcomes:
+                if future.done():
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
@@ -1,26 +1,45 @@
+import logging
+import os
 from contextlib import asynccontextmanager
 from http import HTTPStatus
 
 from fastapi import FastAPI, Request
+from fastapi.encoders import jsonable_encoder
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import Response
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
+from app.books.cache import book_read_cache, book_reads
+from app.books.repository import book_writes
 from app.books.router import router as books_router
 from app.core.database import create_db_and_tables
 from app.core.error_schema import ErrorResponse, utc_now_iso
 from app.core.exceptions import AppException
+from app.core.metrics import CONTENT_TYPE, MetricsMiddleware, registry
+from app.core.profiling import ProfilingMiddleware
+from app.core.query_stats import QueryStatsMiddleware
+from app.core.responses import FastJSONResponse
+from app.core.security import password_hasher, token_cache
+from app.users.cache import user_cache
 from app.users.router import router as users_router
 
+# Handler na raiz só se ninguém configurou logging (uvicorn configura apenas os
+# loggers "uvicorn.*"); o nível vale para os loggers da aplicação
+logging.basicConfig(format="%(levelname)s:     %(name)s - %(message)s")
+logging.getLogger("app").setLevel(os.getenv("LOG_LEVEL", "INFO"))
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     create_db_and_tables()
     yield
+    if book_writes is not None:
+        await book_writes.close()
+    password_hasher.shutdown()
 
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -31,6 +50,19 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Por dentro das métricas: o profiling cobre dependências, serviço e serialização
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(QueryStatsMiddleware)
+# Por último: fica por fora de todos e mede a requisição inteira
+app.add_middleware(MetricsMiddleware)
+
+# Estatísticas dos caches e do single-flight, lidas a cada coleta de /metrics
+registry.register_stats("book_read_cache", book_read_cache.stats)
+registry.register_stats("book_reads", book_reads.stats)
+registry.register_stats("token_cache", token_cache.stats)
+registry.register_stats("user_cache", user_cache.stats)
+if book_writes is not None:
+    registry.register_stats("book_writes", book_writes.stats)
 
 
 @app.exception_handler(AppException)
@@ -42,7 +74,7 @@ async def app_exception_handler(request: Request, exc: AppException):
         status=exc.status_code,
         timestamp=utc_now_iso(),
     )
-    return JSONResponse(status_code=exc.status_code, content=payload.model_dump())
+    return FastJSONResponse(status_code=exc.status_code, content=payload)
 
 
 @app.exception_handler(RequestValidationError)
@@ -55,8 +87,9 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
         timestamp=utc_now_iso(),
     )
     content = payload.model_dump()
-    content["errors"] = exc.errors()
-    return JSONResponse(status_code=HTTPStatus.UNPROCESSABLE_ENTITY, content=content)
+    # `ctx` de erros de validadores traz a exceção original, que não é JSON
+    content["errors"] = jsonable_encoder(exc.errors())
+    return FastJSONResponse(status_code=HTTPStatus.UNPROCESSABLE_ENTITY, content=content)
 
 
 @app.exception_handler(StarletteHTTPException)
@@ -68,7 +101,7 @@ async def http_exception_handler(request: Request, exc: StarletteHTTPException):
         status=exc.status_code,
         timestamp=utc_now_iso(),
     )
-    return JSONResponse(status_code=exc.status_code, content=payload.model_dump())
+    return FastJSONResponse(status_code=exc.status_code, content=payload)
 
 
 @app.exception_handler(Exception)
@@ -80,7 +113,7 @@ async def unhandled_exception_handler(request: Request, exc: Exception):
         status=HTTPStatus.INTERNAL_SERVER_ERROR,
         timestamp=utc_now_iso(),
     )
-    return JSONResponse(status_code=HTTPStatus.INTERNAL_SERVER_ERROR, content=payload.model_dump())
+    return FastJSONResponse(status_code=HTTPStatus.INTERNAL_SERVER_ERROR, content=payload)
 
 
 @app.get("/health")
@@ -88,5 +121,11 @@ def health_check():
     return {"status": "ok"}
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    # Formato texto do Prometheus; não exponha publicamente
+    return Response(registry.render(), media_type=CONTENT_TYPE)
+
+
 app.include_router(books_router)
 app.include_router(users_router)
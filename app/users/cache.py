@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+from app.core.cache import TTLCache
+from app.core.config import USER_CACHE_SIZE, USER_CACHE_TTL_SECONDS
+from app.users.model import User
+
+# Usuários ativos já autenticados, por id. Guarda cópias desligadas da sessão
+# que as carregou; qualquer escrita em um usuário pelo repositório invalida.
+user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL_SECONDS)
+
+
+def cache_user(user: User) -> None:
+    user_cache.set(user.id, User.model_validate(user.model_dump()))
+
+
+def get_cached_user(user_id: int) -> User | None:
+    return user_cache.get(user_id)
+
+
+def invalidate_user(user_id: int) -> None:
+    user_cache.delete(user_id)
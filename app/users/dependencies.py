@@ -3,26 +3,28 @@ from http import HTTPStatus
 from fastapi import Depends
 from fastapi.security import OAuth2PasswordBearer
 from jwt import ExpiredSignatureError, InvalidTokenError
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.core.database import get_session
+from app.core.database import current_user_id, get_read_session
 from app.core.exceptions import AppException
-from app.core.security import decode_access_token
+from app.core.security import decode_access_token_cached
+from app.users.cache import cache_user, get_cached_user
 from app.users.model import User
 from app.users.repository import get_user_by_id
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/users/token")
 
-session_dependency = Depends(get_session)
+# Só lê o usuário: vai para o engine de leitura
+session_dependency = Depends(get_read_session)
 token_dependency = Depends(oauth2_scheme)
 
 
-def get_current_user(
+async def get_current_user(
     token: str = token_dependency,
-    session: Session = session_dependency,
+    session: AsyncSession = session_dependency,
 ) -> User:
     try:
-        payload = decode_access_token(token)
+        payload = decode_access_token_cached(token)
         user_id = payload.get("sub")
 
         if not user_id:
@@ -46,7 +48,19 @@ def get_current_user(
             title="Unauthorized",
         ) from err
 
-    user = get_user_by_id(session=session, user_id=int(user_id))
+    # Leituras seguintes desta requisição sabem de quem são (read-your-writes)
+    current_user_id.set(int(user_id))
+
+    # Só usuários ativos entram no cache; escritas no usuário o invalidam
+    user = get_cached_user(int(user_id))
+    if user:
+        return user
+
+    user = await get_user_by_id(session=session, user_id=int(user_id))
+    # Devolve a conexão ao pool já: logo após uma escrita ela é do engine de
+    # escrita, e a sessão de escrita da rota precisaria de uma segunda conexão
+    # do mesmo pool (com muitas requisições assim, o pool esgota e trava)
+    await session.close()
 
     if not user or not user.is_active:
         raise AppException(
@@ -55,4 +69,5 @@ def get_current_user(
             title="Unauthorized",
         )
 
+    cache_user(user)
     return user
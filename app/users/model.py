@@ -14,6 +14,10 @@ class UserBase(SQLModel):
 class User(UserBase, table=True):
     __tablename__ = "users"
 
+    # Colunas geradas pelo banco (id, created_at) vêm no RETURNING do INSERT,
+    # sem um SELECT de refresh depois do commit
+    __mapper_args__ = {"eager_defaults": True}
+
     id: int | None = Field(default=None, primary_key=True)
     hashed_password: str = Field(nullable=False)
     is_active: bool = Field(default=True, nullable=False)
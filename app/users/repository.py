@@ -1,22 +1,34 @@
 from __future__ import annotations
 
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app.core.database import note_write
+from app.users.cache import invalidate_user
 from app.users.model import User
 
 
-def get_user_by_email(*, session: Session, email: str) -> User | None:
+async def get_user_by_email(*, session: AsyncSession, email: str) -> User | None:
     statement = select(User).where(User.email == email)
-    return session.exec(statement).first()
+    return (await session.exec(statement)).first()
 
 
-def get_user_by_id(*, session: Session, user_id: int) -> User | None:
+async def get_user_by_id(*, session: AsyncSession, user_id: int) -> User | None:
     statement = select(User).where(User.id == user_id)
-    return session.exec(statement).first()
+    return (await session.exec(statement)).first()
 
 
-def create_user(*, session: Session, user: User) -> User:
+async def create_user(*, session: AsyncSession, user: User) -> User:
+    # id e created_at voltam no RETURNING do próprio INSERT (eager_defaults)
     session.add(user)
-    session.commit()
-    session.refresh(user)
+    await session.commit()
+    note_write(user.id)
+    return user
+
+
+async def update_user(*, session: AsyncSession, user: User) -> User:
+    session.add(user)
+    await session.commit()
+    invalidate_user(user.id)
+    note_write(user.id)
     return user
@@ -2,7 +2,7 @@ from http import HTTPStatus
 
 from fastapi import APIRouter, Depends, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core.database import get_session
 from app.core.error_schema import ErrorResponse
@@ -24,9 +24,9 @@ router = APIRouter(prefix="/users", tags=["Users"])
         422: {"model": ErrorResponse, "description": "Validation error"},
     },
 )
-def create_user(payload: UserCreate, session: Session = Depends(get_session)):
+async def create_user(payload: UserCreate, session: AsyncSession = Depends(get_session)):
     try:
-        return register_user(
+        return await register_user(
             session=session,
             email=str(payload.email),
             password=payload.password,
@@ -46,9 +46,9 @@ def create_user(payload: UserCreate, session: Session = Depends(get_session)):
         422: {"model": ErrorResponse, "description": "Validation error"},
     },
 )
-def login(
+async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
 ):
     """
     OAuth2PasswordRequestForm envia:
@@ -57,7 +57,7 @@ def login(
 
     Aqui username = email.
     """
-    user = authenticate_user(
+    user = await authenticate_user(
         session=session,
         email=form_data.username,
         password=form_data.password,
@@ -1,12 +1,14 @@
 from __future__ import annotations
 
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.core.security import get_password_hash, verify_password
+from app.core.security import get_password_hash_async, verify_password_async
 from app.users.model import User
 from app.users.repository import (
     create_user,
     get_user_by_email,
+    get_user_by_id,
+    update_user,
 )
 
 
@@ -14,31 +16,41 @@ class UserAlreadyExistsError(Exception):
     pass
 
 
-def register_user(*, session: Session, email: str, password: str) -> User:
-    existing_user = get_user_by_email(session=session, email=email)
+async def register_user(*, session: AsyncSession, email: str, password: str) -> User:
+    existing_user = await get_user_by_email(session=session, email=email)
     if existing_user:
         raise UserAlreadyExistsError("User with this email already exists")
 
-    hashed_password = get_password_hash(password)
+    hashed_password = await get_password_hash_async(password)
 
     user = User(
         email=email,
         hashed_password=hashed_password,
     )
 
-    return create_user(session=session, user=user)
+    return await create_user(session=session, user=user)
 
 
-def authenticate_user(*, session: Session, email: str, password: str) -> User | None:
-    user = get_user_by_email(session=session, email=email)
+async def authenticate_user(*, session: AsyncSession, email: str, password: str) -> User | None:
+    user = await get_user_by_email(session=session, email=email)
 
     if not user:
         return None
 
-    if not verify_password(password, user.hashed_password):
+    if not await verify_password_async(password, user.hashed_password):
         return None
 
     if not user.is_active:
         return None
 
     return user
+
+
+async def deactivate_user(*, session: AsyncSession, user_id: int) -> User | None:
+    user = await get_user_by_id(session=session, user_id=user_id)
+
+    if not user:
+        return None
+
+    user.is_active = False
+    return await update_user(session=session, user=user)
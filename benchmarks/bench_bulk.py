@@ -0,0 +1,60 @@
+"""
+Importação de livros: um POST /books por livro x POST /books/bulk.
+
+    uv run python -m benchmarks.bench_bulk [--books 5000] [--chunk-size 500]
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+
+import httpx
+
+from .bench_concurrency import _prepare, _server
+
+
+async def _one_by_one(url: str, headers: dict[str, str], books: list[dict]) -> float:
+    async with httpx.AsyncClient(base_url=url, headers=headers) as client:
+        started = time.perf_counter()
+        for book in books:
+            response = await client.post("/books/", json=book)
+            response.raise_for_status()
+        return time.perf_counter() - started
+
+
+async def _bulk(url: str, headers: dict[str, str], books: list[dict]) -> float:
+    async with httpx.AsyncClient(base_url=url, headers=headers, timeout=120) as client:
+        started = time.perf_counter()
+        response = await client.post("/books/bulk", json=books)
+        response.raise_for_status()
+        assert response.json()["created"] == len(books)
+        return time.perf_counter() - started
+
+
+async def _benchmark(url: str, args):
+    headers = await _prepare(url, 0)
+    books = [{"title": f"Book {i}", "author": "Author"} for i in range(args.books)]
+
+    single = await _one_by_one(url, headers, books)
+    bulk = await _bulk(url, headers, books)
+
+    print(f"{args.books} books, chunks of {args.chunk_size} ({url})")
+    print(f"{'mode':<14}{'seconds':>10}{'books/s':>12}")
+    print(f"{'one by one':<14}{single:>10.2f}{args.books / single:>12.0f}")
+    print(f"{'bulk':<14}{bulk:>10.2f}{args.books / bulk:>12.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--books", type=int, default=5000)
+    parser.add_argument("--chunk-size", type=int, default=500)
+    args = parser.parse_args()
+
+    settings = {"BOOK_BULK_CHUNK_SIZE": str(args.chunk_size)}
+    with tempfile.TemporaryDirectory() as directory, _server(directory, **settings) as url:
+        asyncio.run(_benchmark(url, args))
+
+
+if __name__ == "__main__":
+    main()
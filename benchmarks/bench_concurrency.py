@@ -0,0 +1,150 @@
+"""
+Requisições/s em GET /books com muitos clientes simultâneos.
+
+Sem --url, sobe um uvicorn com a aplicação deste checkout sobre um banco
+temporário. Para comparar com outra versão, suba-a à parte e passe --url.
+
+    uv run python -m benchmarks.bench_concurrency [--concurrency 50 500] [--duration 10]
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import httpx
+
+EMAIL = "bench@example.com"
+PASSWORD = "bench-password"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def _server(directory: str, workers: int = 1, **settings: str):
+    port = _free_port()
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{Path(directory) / 'bench.db'}",
+        **settings,
+    }
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "app.main:app",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--log-level",
+            "warning",
+            "--no-access-log",
+        ],
+        env=env,
+    )
+    url = f"http://127.0.0.1:{port}"
+
+    try:
+        for _ in range(100):
+            try:
+                httpx.get(f"{url}/health")
+                break
+            except httpx.TransportError:
+                time.sleep(0.1)
+        yield url
+    finally:
+        process.terminate()
+        process.wait()
+
+
+async def _prepare(url: str, books: int) -> dict[str, str]:
+    async with httpx.AsyncClient(base_url=url) as client:
+        await client.post("/users/", json={"email": EMAIL, "password": PASSWORD})
+        response = await client.post("/users/token", data={"username": EMAIL, "password": PASSWORD})
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        for i in range(books):
+            await client.post(
+                "/books/",
+                json={"title": f"Book {i}", "author": "Author"},
+                headers=headers,
+            )
+
+    return headers
+
+
+async def _run(url: str, headers: dict[str, str], concurrency: int, duration: float):
+    latencies: list[float] = []
+    errors = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=url, headers=headers, limits=limits) as client:
+        deadline = time.perf_counter() + duration
+
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    response = await client.get("/books/?size=10", timeout=30)
+                    ok = response.status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                if ok:
+                    latencies.append(time.perf_counter() - started)
+                else:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1000 if latencies else 0
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else 0
+    return len(latencies) / elapsed, p50, p99, errors
+
+
+async def _benchmark(url: str, args):
+    headers = await _prepare(url, args.books)
+
+    print(f"GET /books/?size=10 for {args.duration:.0f}s per level ({url})")
+    print(f"{'clients':>8}{'req/s':>10}{'p50 (ms)':>10}{'p99 (ms)':>10}{'errors':>8}")
+
+    for concurrency in args.concurrency:
+        rps, p50, p99, errors = await _run(url, headers, concurrency, args.duration)
+        print(f"{concurrency:>8}{rps:>10.0f}{p50:>10.1f}{p99:>10.1f}{errors:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", help="servidor já em execução")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[50, 500])
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--books", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.url:
+        asyncio.run(_benchmark(args.url, args))
+        return
+
+    with tempfile.TemporaryDirectory() as directory, _server(directory, args.workers) as url:
+        asyncio.run(_benchmark(url, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+POST /books com muitos clientes: um commit por escrita x commits agrupados.
+
+Cada configuração sobe um uvicorn sobre um banco temporário novo.
+
+    uv run python -m benchmarks.bench_group_commit [--clients 50] [--duration 10]
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.bench_concurrency import _prepare, _server
+from benchmarks.bench_login_flood import _percentiles
+
+CONFIGS = {
+    "per-request": {"BOOK_WRITE_COALESCING": "false"},
+    "grouped 2ms": {"BOOK_WRITE_COALESCING": "true", "BOOK_WRITE_WINDOW_MS": "2"},
+    "grouped 10ms": {"BOOK_WRITE_COALESCING": "true", "BOOK_WRITE_WINDOW_MS": "10"},
+}
+
+
+async def _run(url: str, clients: int, duration: float):
+    headers = await _prepare(url, 0)
+    latencies: list[float] = []
+    errors = 0
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+
+    async with httpx.AsyncClient(base_url=url, headers=headers, limits=limits) as client:
+        deadline = time.perf_counter() + duration
+
+        async def worker(n: int):
+            nonlocal errors
+            i = 0
+            while time.perf_counter() < deadline:
+                i += 1
+                started = time.perf_counter()
+                try:
+                    response = await client.post(
+                        "/books/", json={"title": f"Book {n}-{i}", "author": "A"}, timeout=30
+                    )
+                    ok = response.status_code == 201
+                except httpx.HTTPError:
+                    ok = False
+                if ok:
+                    latencies.append(time.perf_counter() - started)
+                else:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(n) for n in range(clients)))
+        elapsed = time.perf_counter() - started
+
+    p50, p99 = _percentiles(latencies)
+    return len(latencies) / elapsed, p50, p99, errors
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--profile", default="default", help="SQLITE_PROFILE do servidor")
+    args = parser.parse_args()
+
+    print(f"POST /books/, {args.clients} clients, {args.duration:.0f}s each ({args.profile})")
+    print(f"{'config':<14}{'writes/s':>10}{'p50 (ms)':>10}{'p99 (ms)':>10}{'errors':>8}")
+
+    for name, settings in CONFIGS.items():
+        with (
+            tempfile.TemporaryDirectory() as directory,
+            _server(directory, SQLITE_PROFILE=args.profile, **settings) as url,
+        ):
+            rate, p50, p99, errors = asyncio.run(_run(url, args.clients, args.duration))
+        print(f"{name:<14}{rate:>10.0f}{p50:>10.1f}{p99:>10.1f}{errors:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+CPU por requisição para devolver uma página de 100 livros: validação do
+`response_model` + encoder padrão x JSON pronto na `FastJSONResponse`.
+
+Chama a aplicação ASGI diretamente, com as linhas já carregadas em memória,
+para medir só a montagem e a serialização da resposta.
+
+    uv run python -m benchmarks.bench_json [--size 100] [--requests 2000]
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import date, datetime
+
+from fastapi import FastAPI
+
+from app.books.model import Book, BookRead, Page, ReadingStatus
+from app.books.serializers import page_json
+from app.core.responses import FastJSONResponse, orjson
+
+
+def _books(size: int) -> list[Book]:
+    return [
+        Book(
+            id=i,
+            title=f"Structure and Interpretation of Computer Programs {i}",
+            author="Harold Abelson",
+            status=ReadingStatus.READING,
+            start_date=date(2024, 1, 1),
+            user_id=1,
+            created_at=datetime(2024, 1, 1, 12, 0, 0),
+            version=1,
+        )
+        for i in range(size)
+    ]
+
+
+def _app(books: list[Book]) -> FastAPI:
+    app = FastAPI()
+    size = len(books)
+    cached = page_json(Page[Book].create(items=books, total=size, page=1, size=size))
+
+    # como as rotas eram antes: BookRead por linha, depois o response_model
+    @app.get("/before", response_model=Page[BookRead])
+    async def before():
+        items = [BookRead.model_validate(book) for book in books]
+        return Page[BookRead].create(items=items, total=size, page=1, size=size)
+
+    @app.get("/before-cached", response_model=Page[BookRead])
+    async def before_cached():
+        return Page[BookRead].model_validate_json(cached)
+
+    @app.get("/after")
+    async def after():
+        page = Page[Book].create(items=books, total=size, page=1, size=size)
+        return FastJSONResponse(page_json(page))
+
+    @app.get("/after-cached")
+    async def after_cached():
+        return FastJSONResponse(cached)
+
+    return app
+
+
+async def _measure(app, path: str, requests: int) -> tuple[float, int]:
+    body = bytearray()
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            body.extend(message.get("body", b""))
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [],
+        "server": ("127.0.0.1", 8000),
+        "client": ("127.0.0.1", 50000),
+    }
+
+    for _ in range(20):
+        await app(dict(scope), receive, send)
+    size = len(body) // 20
+
+    started = time.process_time()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return (time.process_time() - started) / requests * 1e6, size
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    app = _app(_books(args.size))
+    encoder = "orjson" if orjson is not None else "pydantic-core"
+
+    print(f"page of {args.size} books, CPU per request ({encoder}), {args.requests} requests")
+    print(f"{'path':<14}{'before (us)':>12}{'after (us)':>12}{'saved':>8}{'bytes':>8}")
+
+    for name in ("", "-cached"):
+        before, size = await _measure(app, f"/before{name}", args.requests)
+        after, _ = await _measure(app, f"/after{name}", args.requests)
+        label = "cache hit" if name else "from rows"
+        print(f"{label:<14}{before:>12.0f}{after:>12.0f}{1 - after / before:>8.0%}{size:>8}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
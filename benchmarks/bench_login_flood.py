@@ -0,0 +1,108 @@
+"""
+Latência de GET /books durante uma rajada de logins (Argon2).
+
+Mede o p50/p99 de leitores de /books sozinhos e com clientes fazendo login sem
+parar, com o hash no pool de processos e, para comparação, em threads
+(PASSWORD_HASH_WORKERS=0).
+
+    uv run python -m benchmarks.bench_login_flood [--duration 10] [--login-clients 50]
+"""
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.bench_concurrency import EMAIL, PASSWORD, _prepare, _server
+
+
+def _percentiles(latencies: list[float]) -> tuple[float, float]:
+    if not latencies:
+        return 0.0, 0.0
+    latencies.sort()
+    p99 = latencies[max(int(len(latencies) * 0.99) - 1, 0)]
+    return statistics.median(latencies) * 1000, p99 * 1000
+
+
+async def _readers(client: httpx.AsyncClient, headers, clients: int, deadline: float):
+    latencies: list[float] = []
+
+    async def reader():
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            response = await client.get("/books/?size=10", headers=headers, timeout=60)
+            if response.status_code == 200:
+                latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(reader() for _ in range(clients)))
+    return latencies
+
+
+async def _flood(client: httpx.AsyncClient, clients: int, deadline: float) -> dict[int, int]:
+    statuses: dict[int, int] = {}
+
+    async def login():
+        while time.perf_counter() < deadline:
+            response = await client.post(
+                "/users/token", data={"username": EMAIL, "password": PASSWORD}, timeout=60
+            )
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    await asyncio.gather(*(login() for _ in range(clients)))
+    return statuses
+
+
+async def _scenario(url: str, args) -> list[str]:
+    headers = await _prepare(url, books=20)
+    rows = []
+
+    async with httpx.AsyncClient(base_url=url) as client:
+        for flood in (False, True):
+            deadline = time.perf_counter() + args.duration
+            readers = _readers(client, headers, args.readers, deadline)
+
+            if flood:
+                latencies, statuses = await asyncio.gather(
+                    readers, _flood(client, args.login_clients, deadline)
+                )
+            else:
+                latencies, statuses = await readers, {}
+
+            p50, p99 = _percentiles(latencies)
+            logins = ", ".join(f"{code}: {count}" for code, count in sorted(statuses.items()))
+            label = "login flood" if flood else "idle"
+            rows.append(f"{label:<14}{p50:>10.1f}{p99:>10.1f}   {logins or '-'}")
+
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--readers", type=int, default=10)
+    parser.add_argument("--login-clients", type=int, default=50)
+    parser.add_argument("--hash-workers", default=None, help="padrão: número de CPUs")
+    args = parser.parse_args()
+
+    modes = {
+        "process pool": {}
+        if args.hash_workers is None
+        else {"PASSWORD_HASH_WORKERS": args.hash_workers},
+        "threads": {"PASSWORD_HASH_WORKERS": "0"},
+    }
+
+    for mode, settings in modes.items():
+        with tempfile.TemporaryDirectory() as directory, _server(directory, **settings) as url:
+            rows = asyncio.run(_scenario(url, args))
+
+        print(f"\n{mode}: GET /books with {args.readers} readers")
+        print(f"{'':<14}{'p50 (ms)':>10}{'p99 (ms)':>10}   logins by status")
+        for row in rows:
+            print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Custo do MetricsMiddleware por requisição e da coleta de /metrics.
+
+Chama a aplicação ASGI diretamente (sem rede nem servidor), com e sem o
+middleware, para isolar o que ele acrescenta ao caminho da requisição.
+
+    uv run python -m benchmarks.bench_metrics [--requests 20000]
+"""
+
+import argparse
+import asyncio
+import time
+
+from fastapi import FastAPI
+
+from app.core.metrics import MetricsMiddleware, registry
+
+
+def _app(with_metrics: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/books/{book_id}")
+    async def get_book(book_id: int):
+        return {"id": book_id}
+
+    if with_metrics:
+        app.add_middleware(MetricsMiddleware)
+    return app
+
+
+async def _measure(app, requests: int) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    def scope(i: int) -> dict:
+        return {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": f"/books/{i}",
+            "raw_path": f"/books/{i}".encode(),
+            "root_path": "",
+            "query_string": b"",
+            "headers": [],
+            "server": ("127.0.0.1", 8000),
+            "client": ("127.0.0.1", 50000),
+        }
+
+    # aquecimento: monta a pilha de middlewares e cria as séries
+    for i in range(100):
+        await app(scope(i), receive, send)
+
+    started = time.perf_counter()
+    for i in range(requests):
+        await app(scope(i), receive, send)
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    # melhor de N rodadas alternadas, para reduzir ruído
+    bare, metered = [], []
+    for _ in range(args.repeat):
+        bare.append(await _measure(_app(False), args.requests))
+        metered.append(await _measure(_app(True), args.requests))
+
+    base, instrumented = min(bare), min(metered)
+    print(f"GET /books/{{id}} through FastAPI, {args.requests} requests, best of {args.repeat}")
+    print(f"{'':<16}{'us/request':>12}")
+    print(f"{'without metrics':<16}{base:>12.1f}")
+    print(f"{'with metrics':<16}{instrumented:>12.1f}")
+    print(f"{'overhead':<16}{instrumented - base:>12.1f}  ({(instrumented / base - 1):.1%})")
+
+    started = time.perf_counter()
+    for _ in range(100):
+        body = registry.render()
+    elapsed = (time.perf_counter() - started) / 100 * 1000
+    print(f"\n/metrics render: {elapsed:.2f} ms for {len(body.splitlines())} lines")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,105 @@
+"""
+Leituras e escritas simultâneas: perfil SQLite "default" x "production".
+
+Cada cliente alterna GET /books e POST /books (--write-ratio das operações
+são escritas). O cache de leitura fica desligado para que toda leitura vá ao
+banco, e sem janela de read-your-writes as leituras usam o engine de leitura.
+
+    uv run python -m benchmarks.bench_mixed [--clients 50] [--write-ratio 0.2] [--workers 2]
+"""
+
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.bench_concurrency import _prepare, _server
+from benchmarks.bench_login_flood import _percentiles
+
+
+async def _run(url: str, headers: dict[str, str], args) -> dict:
+    reads: list[float] = []
+    writes: list[float] = []
+    errors = 0
+    rng = random.Random(42)
+    limits = httpx.Limits(max_connections=args.clients, max_keepalive_connections=args.clients)
+
+    async with httpx.AsyncClient(base_url=url, headers=headers, limits=limits) as client:
+        deadline = time.perf_counter() + args.duration
+
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                write = rng.random() < args.write_ratio
+                started = time.perf_counter()
+                try:
+                    if write:
+                        response = await client.post(
+                            "/books/", json={"title": "Book", "author": "Author"}, timeout=60
+                        )
+                    else:
+                        response = await client.get("/books/?size=10", timeout=60)
+                    ok = response.is_success
+                except httpx.HTTPError:
+                    ok = False
+
+                if not ok:
+                    errors += 1
+                elif write:
+                    writes.append(time.perf_counter() - started)
+                else:
+                    reads.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.clients)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "ops": (len(reads) + len(writes)) / elapsed,
+        "read": _percentiles(reads),
+        "write": _percentiles(writes),
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    print(
+        f"{args.clients} clients, {args.write_ratio:.0%} writes, {args.workers} workers, "
+        f"{args.duration:.0f}s per profile"
+    )
+    print(
+        f"{'profile':<12}{'ops/s':>8}{'read p50':>10}{'read p99':>10}"
+        f"{'write p50':>11}{'write p99':>11}{'errors':>8}"
+    )
+
+    for profile in ("default", "production"):
+        settings = {
+            "SQLITE_PROFILE": profile,
+            "BOOK_CACHE_BACKEND": "none",
+            "READ_YOUR_WRITES_SECONDS": "0",
+            "WEB_CONCURRENCY": str(args.workers),
+        }
+        with tempfile.TemporaryDirectory() as directory:
+            with _server(directory, args.workers, **settings) as url:
+                headers = asyncio.run(_prepare(url, books=100))
+                result = asyncio.run(_run(url, headers, args))
+
+        (read_p50, read_p99), (write_p50, write_p99) = result["read"], result["write"]
+        print(
+            f"{profile:<12}{result['ops']:>8.0f}{read_p50:>10.1f}{read_p99:>10.1f}"
+            f"{write_p50:>11.1f}{write_p99:>11.1f}{result['errors']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
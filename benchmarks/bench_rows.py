@@ -0,0 +1,154 @@
+"""
+Páginas de 100 livros: entidades `Book` do ORM x tuplas só com as colunas de
+`BookRead`, da query até o JSON da resposta.
+
+CPU por página (process_time) e pico de memória alocada por página
+(tracemalloc, em uma rodada separada para não distorcer o tempo).
+
+Com `--fields title,status`, acrescenta as tuplas só com esses campos (o
+`fields=` das rotas).
+
+    uv run python -m benchmarks.bench_rows [--books 10000] [--size 100] [--repeat 200]
+                                           [--fields title,status]
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import Session, SQLModel, create_engine, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.books.model import READ_FIELDS, Book, BookFilters, Page, parse_fields
+from app.books.repository import BookRepository
+from app.books.serializers import page_json, row_page_json
+from app.users.model import User
+
+
+def _populate(engine, books: int) -> int:
+    with Session(engine) as session:
+        user = User(email="bench@example.com", hashed_password="x")
+        session.add(user)
+        session.commit()
+        user_id = user.id
+
+        rows = [
+            {
+                "title": f"Structure and Interpretation of Computer Programs {i}",
+                "author": "Harold Abelson",
+                "status": "READING",
+                "user_id": user_id,
+            }
+            for i in range(books)
+        ]
+        session.execute(insert(Book), rows)
+        session.commit()
+
+    return user_id
+
+
+def _entities(user_id: int, size: int):
+    # como a listagem carregava antes: Book inteiro, mesma ordem e limite
+    statement = (
+        select(Book)
+        .where(Book.user_id == user_id)
+        .order_by(Book.created_at.desc(), Book.id.desc())
+        .limit(size + 1)
+    )
+
+    async def load(session: AsyncSession) -> bytes:
+        items = (await session.exec(statement)).all()
+        has_next = len(items) > size
+        page = Page[Book].create(
+            items=items[:size], total=None, page=1, size=size, has_next=has_next
+        )
+        return page_json(page)
+
+    return load
+
+
+def _rows(user_id: int, size: int, fields=READ_FIELDS):
+    repository = BookRepository()
+    filters = BookFilters()
+
+    async def load(session: AsyncSession) -> bytes:
+        items, total, has_next = await repository.list_paginated(
+            session,
+            page=1,
+            size=size,
+            filters=filters,
+            user_id=user_id,
+            include_total=False,
+            fields=fields,
+        )
+        return row_page_json(items, fields, total=total, page=1, size=size, has_next=has_next)
+
+    return load
+
+
+async def _cpu(async_engine, load, repeat: int) -> float:
+    async with AsyncSession(async_engine) as session:
+        await load(session)
+        started = time.process_time()
+        for _ in range(repeat):
+            await load(session)
+        return (time.process_time() - started) / repeat * 1e6
+
+
+async def _memory(async_engine, load) -> tuple[int, int]:
+    async with AsyncSession(async_engine) as session:
+        body = await load(session)
+
+        tracemalloc.start()
+        try:
+            await load(session)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return peak, len(body)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--books", type=int, default=10_000)
+    parser.add_argument("--size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--fields", help="campos de BookRead separados por vírgula")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "bench.db"
+        engine = create_engine(f"sqlite:///{path}")
+        SQLModel.metadata.create_all(engine)
+        user_id = _populate(engine, args.books)
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+
+        cases = {"entities": _entities(user_id, args.size), "rows": _rows(user_id, args.size)}
+        if args.fields:
+            cases["fields"] = _rows(user_id, args.size, parse_fields(args.fields))
+
+        print(f"page of {args.size} books, {args.repeat} pages per case")
+        print(f"{'path':<10}{'CPU (us)':>10}{'peak (KiB)':>12}{'bytes':>8}")
+
+        results = {}
+        for name, load in cases.items():
+            cpu = await _cpu(async_engine, load, args.repeat)
+            peak, size = await _memory(async_engine, load)
+            results[name] = cpu, peak
+            print(f"{name:<10}{cpu:>10.0f}{peak / 1024:>12.1f}{size:>8}")
+
+        (cpu_before, peak_before), (cpu_after, peak_after) = results["entities"], results["rows"]
+        cpu_saved, memory_saved = 1 - cpu_after / cpu_before, 1 - peak_after / peak_before
+        print(f"saved: CPU {cpu_saved:.0%}, memory {memory_saved:.0%}")
+
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,111 @@
+"""
+Filtro por título/autor: índice FTS5 x ilike, com 100k livros por usuário.
+
+O banco é compartilhado por `--users` usuários com bibliotecas do mesmo
+tamanho, e as consultas são de um deles, como em produção.
+
+    uv run python -m benchmarks.bench_search [--books 100000] [--users 10] [--repeat 20]
+"""
+
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.books.model import Book, BookFilters
+from app.books.repository import BookRepository
+from app.books.search import search_index
+from app.users.model import User
+
+WORDS = (
+    "clean code domain driven design refactoring patterns enterprise architecture "
+    "pragmatic programmer legacy systems distributed data intensive applications "
+    "structure interpretation computer programs algorithms introduction compilers"
+).split()
+AUTHORS = [f"Author {name}" for name in ("Martin", "Fowler", "Evans", "Beck", "Knuth", "Hunt")]
+
+
+def _populate(engine, books: int, users: int) -> list[int]:
+    rng = random.Random(42)
+    user_ids = []
+
+    with Session(engine) as session:
+        for n in range(users):
+            user = User(email=f"bench{n}@example.com", hashed_password="x")
+            session.add(user)
+            session.commit()
+            user_ids.append(user.id)
+
+            rows = [
+                {
+                    "title": " ".join(rng.choices(WORDS, k=4)) + f" {i}",
+                    "author": rng.choice(AUTHORS),
+                    "status": "TO_READ",
+                    "user_id": user.id,
+                }
+                for i in range(books)
+            ]
+            session.execute(insert(Book), rows)
+            session.commit()
+
+    return user_ids
+
+
+async def _measure(session, user_id: int, filters: BookFilters, repeat: int) -> float:
+    repository = BookRepository()
+    started = time.perf_counter()
+
+    for _ in range(repeat):
+        await repository.list_paginated(session, page=1, size=10, filters=filters, user_id=user_id)
+
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--books", type=int, default=100_000, help="livros por usuário")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "bench.db"
+        engine = create_engine(f"sqlite:///{path}")
+        SQLModel.metadata.create_all(engine)
+        user_ids = _populate(engine, args.books, args.users)
+        # um usuário do meio: livros dos outros antes e depois dos dele
+        user_id = user_ids[len(user_ids) // 2]
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+
+        cases = {
+            "title=interpretation": BookFilters(title="interpretation"),
+            "author=knuth": BookFilters(author="knuth"),
+            "title=compilers 1234": BookFilters(title="compilers 1234"),
+        }
+
+        print(
+            f"{args.books} books per user, {args.users} users, "
+            f"page size 10, mean of {args.repeat} runs"
+        )
+        print(f"{'filter':<24}{'ilike (ms)':>12}{'fts5 (ms)':>12}{'speed-up':>10}")
+
+        async with AsyncSession(async_engine) as session:
+            for name, filters in cases.items():
+                search_index.available = False
+                ilike = await _measure(session, user_id, filters, args.repeat)
+                search_index.available = True
+                fts = await _measure(session, user_id, filters, args.repeat)
+                print(f"{name:<24}{ilike:>12.2f}{fts:>12.2f}{ilike / fts:>9.1f}x")
+
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,38 +1,82 @@
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy.pool import StaticPool
-from sqlmodel import Session, SQLModel, create_engine
-
-from app.core.database import get_session
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from sqlmodel import SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.books.cache import book_read_cache
+from app.books.repository import book_counts
+from app.core.database import (
+    get_read_session,
+    get_session,
+    read_only_database_url,
+    read_session,
+    recent_writers,
+)
+from app.core.security import token_cache
 from app.main import app
+from app.users.cache import user_cache
 
-# Banco em memória
-TEST_DATABASE_URL = "sqlite:///:memory:"
 
-engine = create_engine(
-    TEST_DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
-)
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
 
 
-# Cria as tabelas antes de cada teste
-@pytest.fixture(name="session")
-def session_fixture():
+# Banco SQLite temporário por teste: a engine síncrona cria as tabelas e a
+# assíncrona (aiosqlite) é usada pelas rotas, ambas no mesmo arquivo
+@pytest.fixture(name="database_path")
+def database_path_fixture(tmp_path):
+    path = tmp_path / "test.db"
+
+    engine = create_engine(f"sqlite:///{path}")
     SQLModel.metadata.create_all(engine)
-    with Session(engine) as session:
+    engine.dispose()
+
+    yield path
+
+    # caches em memória não podem sobreviver ao banco de cada teste
+    book_counts.clear()
+    book_read_cache.clear()
+    user_cache.clear()
+    token_cache.clear()
+    recent_writers.clear()
+
+
+@pytest.fixture(name="async_engine")
+def async_engine_fixture(database_path):
+    # NullPool: nenhuma conexão fica presa ao event loop de um TestClient
+    return create_async_engine(f"sqlite+aiosqlite:///{database_path}", poolclass=NullPool)
+
+
+@pytest.fixture(name="read_engine")
+def read_engine_fixture(database_path):
+    # Rotas de leitura usam conexões somente leitura ao mesmo arquivo
+    url = read_only_database_url(f"sqlite+aiosqlite:///{database_path}")
+    return create_async_engine(url, poolclass=NullPool)
+
+
+@pytest.fixture(name="session")
+async def session_fixture(async_engine):
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
         yield session
-    SQLModel.metadata.drop_all(engine)
 
 
 # Override da dependência
 @pytest.fixture(name="client")
-def client_fixture(session: Session):
+def client_fixture(async_engine, read_engine):
 
-    def get_session_override():
-        yield session
+    async def get_session_override():
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            yield session
+
+    async def get_read_session_override():
+        async with read_session(read_engine, async_engine) as session:
+            yield session
 
     app.dependency_overrides[get_session] = get_session_override
+    app.dependency_overrides[get_read_session] = get_read_session_override
 
     with TestClient(app) as client:
         yield client
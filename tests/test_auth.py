@@ -1,7 +1,18 @@
+import asyncio
+import time
 import uuid
+from datetime import UTC, datetime, timedelta
 from http import HTTPStatus
 
+import jwt
+import pytest
 from fastapi.testclient import TestClient
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import JWT_ALGORITHM, SECRET_KEY
+from app.core.security import AccessTokenCache, password_hasher, token_cache
+from app.users.cache import user_cache
+from app.users.service import deactivate_user
 
 PASSWORD = "12345678"
 PROTECTED_URL = "/books/"
@@ -110,3 +121,95 @@ def test_protected_endpoint_should_allow_access_with_valid_token(client: TestCli
     data = response.json()
     assert set(["items", "total", "page", "size", "pages"]).issubset(data.keys())
     assert isinstance(data["items"], list)
+
+
+def test_authenticated_user_should_be_served_from_cache(client: TestClient):
+    email = _unique_email()
+    user_id = _create_user(client, email=email).json()["id"]
+    token = _login(client, email=email).json()["access_token"]
+
+    client.get(PROTECTED_URL, headers=_auth_headers(token))
+    misses = user_cache.misses
+    hits = user_cache.hits
+
+    response = client.get(PROTECTED_URL, headers=_auth_headers(token))
+
+    assert response.status_code == HTTPStatus.OK, response.text
+    assert user_cache.hits == hits + 1
+    assert user_cache.misses == misses
+    assert user_cache.get(user_id).email == email
+
+
+def test_deactivated_user_should_lose_access_even_when_cached(client: TestClient, async_engine):
+    email = _unique_email()
+    user_id = _create_user(client, email=email).json()["id"]
+    token = _login(client, email=email).json()["access_token"]
+
+    assert client.get(PROTECTED_URL, headers=_auth_headers(token)).status_code == HTTPStatus.OK
+
+    async def deactivate():
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            await deactivate_user(session=session, user_id=user_id)
+
+    asyncio.run(deactivate())
+
+    response = client.get(PROTECTED_URL, headers=_auth_headers(token))
+    assert response.status_code == HTTPStatus.UNAUTHORIZED, response.text
+
+
+def test_create_user_should_return_503_when_password_queue_is_full(client: TestClient, monkeypatch):
+    monkeypatch.setattr(password_hasher, "max_pending", 0)
+
+    response = _create_user(client, email=_unique_email())
+
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE, response.text
+    assert response.json()["title"] == "Service unavailable"
+
+
+def test_login_should_release_password_queue_slots(client: TestClient):
+    email = _unique_email()
+    _create_user(client, email=email)
+
+    wrong_password = _login(client, email=email, password="wrongpass123")
+
+    assert _login(client, email=email).status_code == HTTPStatus.OK
+    assert wrong_password.status_code == HTTPStatus.UNAUTHORIZED
+    assert password_hasher.pending == 0
+
+
+def test_verified_token_should_be_served_from_cache(client: TestClient):
+    email = _unique_email()
+    _create_user(client, email=email)
+    token = _login(client, email=email).json()["access_token"]
+
+    events = []
+
+    def hook(hit, seconds):
+        events.append(hit)
+
+    token_cache.add_hook(hook)
+    try:
+        client.get(PROTECTED_URL, headers=_auth_headers(token))
+        client.get(PROTECTED_URL, headers=_auth_headers(token))
+    finally:
+        token_cache.remove_hook(hook)
+
+    assert events[-2:] == [False, True]
+    assert token_cache.stats()["hit_rate"] == 0.5
+
+
+def test_token_cache_should_never_serve_expired_tokens():
+    cache = AccessTokenCache(maxsize=10, ttl=300)
+    exp = datetime.now(UTC) + timedelta(seconds=1)
+    token = jwt.encode({"sub": "1", "exp": exp}, SECRET_KEY, algorithm=JWT_ALGORITHM)
+
+    cache.decode(token)
+    assert cache.decode(token)["sub"] == "1"
+    assert cache.stats()["hits"] == 1
+
+    time.sleep(1.1)
+
+    with pytest.raises(jwt.ExpiredSignatureError):
+        cache.decode(token)
+
+    assert cache.stats()["hits"] == 1
@@ -1,5 +1,16 @@
+import csv
+import io
+import json
+import sqlite3
 from http import HTTPStatus
 
+import pytest
+from sqlalchemy import event
+from sqlmodel import select
+
+from app.books.model import Book, BookRead
+from app.books.search import book_fts, search_index
+
 
 def test_should_create_book_successfully(client, auth_headers):
     response = client.post(
@@ -262,3 +273,798 @@ def test_user_cannot_access_other_users_book(client, auth_headers):
     # usuário 2 tenta deletar o livro do usuário 1
     delete_response = client.delete(f"/books/{book_id}", headers=auth_headers_user2)
     assert delete_response.status_code == HTTPStatus.NOT_FOUND
+
+
+def _collect_by_cursor(client, auth_headers, query: str) -> list[dict]:
+    items = []
+    cursor = None
+
+    while True:
+        url = f"/books/?pagination=cursor&size=2&{query}"
+        if cursor:
+            url += f"&cursor={cursor}"
+
+        response = client.get(url, headers=auth_headers)
+        assert response.status_code == HTTPStatus.OK, response.text
+
+        data = response.json()
+        items.extend(data["items"])
+        cursor = data["next_cursor"]
+
+        if cursor is None:
+            return items
+
+
+def test_should_paginate_books_by_cursor_without_repeating_rows(client, auth_headers):
+    # created_at repetido entre livros criados no mesmo segundo
+    for i in range(5):
+        client.post(
+            "/books/",
+            json={"title": f"Book {i}", "author": "Author", "status": "TO_READ"},
+            headers=auth_headers,
+        )
+
+    items = _collect_by_cursor(client, auth_headers, "order_by=created_at&order=desc")
+
+    ids = [item["id"] for item in items]
+    assert len(ids) == 5
+    assert ids == sorted(ids, reverse=True)
+
+
+def test_should_paginate_by_cursor_over_nullable_column(client, auth_headers):
+    for i, start_date in enumerate([None, "2024-01-10", None, "2024-01-05", "2024-01-10"]):
+        client.post(
+            "/books/",
+            json={"title": f"Book {i}", "author": "Author", "start_date": start_date},
+            headers=auth_headers,
+        )
+
+    expected = client.get("/books/?size=100&order_by=start_date&order=asc", headers=auth_headers)
+    expected_ids = [item["id"] for item in expected.json()["items"]]
+
+    for order in ("asc", "desc"):
+        items = _collect_by_cursor(client, auth_headers, f"order_by=start_date&order={order}")
+        ids = [item["id"] for item in items]
+
+        assert ids == (expected_ids if order == "asc" else expected_ids[::-1])
+
+
+def test_should_return_400_for_invalid_cursor(client, auth_headers):
+    response = client.get("/books/?cursor=not-a-cursor", headers=auth_headers)
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_should_return_400_when_cursor_ordering_changes(client, auth_headers):
+    for i in range(3):
+        client.post(
+            "/books/",
+            json={"title": f"Book {i}", "author": "Author", "status": "TO_READ"},
+            headers=auth_headers,
+        )
+
+    first_page = client.get("/books/?pagination=cursor&size=1", headers=auth_headers).json()
+
+    response = client.get(
+        f"/books/?cursor={first_page['next_cursor']}&order_by=title",
+        headers=auth_headers,
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_should_skip_total_when_include_total_is_false(client, auth_headers):
+    for i in range(3):
+        client.post(
+            "/books/",
+            json={"title": f"Book {i}", "author": "Author", "status": "TO_READ"},
+            headers=auth_headers,
+        )
+
+    page_1 = client.get("/books/?size=2&include_total=false", headers=auth_headers).json()
+    page_2 = client.get("/books/?size=2&page=2&include_total=false", headers=auth_headers).json()
+
+    assert page_1["total"] is None
+    assert page_1["pages"] is None
+    assert page_1["has_next"] is True
+    assert len(page_1["items"]) == 2
+
+    assert page_2["has_next"] is False
+    assert len(page_2["items"]) == 1
+
+
+def test_should_keep_total_up_to_date_after_create_and_delete(client, auth_headers):
+    ids = []
+    for i in range(2):
+        response = client.post(
+            "/books/",
+            json={"title": f"Book {i}", "author": "Author", "status": "TO_READ"},
+            headers=auth_headers,
+        )
+        ids.append(response.json()["id"])
+
+    assert client.get("/books/", headers=auth_headers).json()["total"] == 2
+
+    client.post(
+        "/books/",
+        json={"title": "Book 2", "author": "Author", "status": "TO_READ"},
+        headers=auth_headers,
+    )
+    assert client.get("/books/", headers=auth_headers).json()["total"] == 3
+
+    client.delete(f"/books/{ids[0]}", headers=auth_headers)
+    data = client.get("/books/?size=2", headers=auth_headers).json()
+
+    assert data["total"] == 2
+    assert data["pages"] == 1
+    assert data["has_next"] is False
+
+
+def test_should_recount_total_after_a_write_from_another_process(
+    client, auth_headers, database_path
+):
+    client.post(
+        "/books/",
+        json={"title": "Book", "author": "Author", "status": "TO_READ"},
+        headers=auth_headers,
+    )
+    assert client.get("/books/", headers=auth_headers).json()["total"] == 1
+
+    # outro worker: escreve direto no arquivo, sem passar pelo repositório
+    with sqlite3.connect(database_path) as connection:
+        connection.execute(
+            "INSERT INTO book (title, author, status, user_id) "
+            "SELECT 'Other', 'Author', 'TO_READ', user_id FROM book"
+        )
+
+    data = client.get("/books/?size=1", headers=auth_headers).json()
+
+    assert data["total"] == 2
+    assert data["pages"] == 2
+    assert data["has_next"] is True
+
+
+def test_should_return_total_for_page_beyond_the_end(client, auth_headers):
+    client.post(
+        "/books/",
+        json={"title": "Book", "author": "Author", "status": "TO_READ"},
+        headers=auth_headers,
+    )
+
+    response = client.get("/books/?page=5&status=TO_READ", headers=auth_headers)
+    data = response.json()
+
+    assert data["items"] == []
+    assert data["total"] == 1
+
+
+def test_should_filter_books_by_author_substring_after_update(client, auth_headers):
+    create_response = client.post(
+        "/books/",
+        json={"title": "Refactoring", "author": "Martin Fowler", "status": "TO_READ"},
+        headers=auth_headers,
+    )
+    book_id = create_response.json()["id"]
+
+    assert client.get("/books/?author=fowl", headers=auth_headers).json()["total"] == 1
+
+    client.put(f"/books/{book_id}", json={"author": "Kent Beck"}, headers=auth_headers)
+
+    assert client.get("/books/?author=fowl", headers=auth_headers).json()["total"] == 0
+    assert client.get("/books/?author=beck", headers=auth_headers).json()["total"] == 1
+
+
+def test_should_search_books_by_title_and_author(client, auth_headers):
+    for title, author in [
+        ("Clean Code", "Robert C. Martin"),
+        ("Refactoring", "Martin Fowler"),
+        ("Domain Driven Design", "Eric Evans"),
+    ]:
+        client.post(
+            "/books/",
+            json={"title": title, "author": author, "status": "TO_READ"},
+            headers=auth_headers,
+        )
+
+    response = client.get("/books/search?q=martin", headers=auth_headers)
+
+    assert response.status_code == HTTPStatus.OK
+    data = response.json()
+
+    assert data["total"] == 2
+    assert {item["title"] for item in data["items"]} == {"Clean Code", "Refactoring"}
+
+    response = client.get("/books/search?q=martin refac", headers=auth_headers)
+
+    assert [item["title"] for item in response.json()["items"]] == ["Refactoring"]
+
+
+def test_search_should_not_return_deleted_books(client, auth_headers):
+    create_response = client.post(
+        "/books/",
+        json={"title": "Gone Book", "author": "Author", "status": "TO_READ"},
+        headers=auth_headers,
+    )
+    client.delete(f"/books/{create_response.json()['id']}", headers=auth_headers)
+
+    response = client.get("/books/search?q=gone", headers=auth_headers)
+
+    assert response.json()["total"] == 0
+
+
+@pytest.mark.anyio
+async def test_search_index_should_only_match_the_users_own_books(session):
+    # 1 e 12: o dono "<1>" não pode casar com "<12>"
+    for user_id in (1, 12, 1):
+        session.add(Book(title="Clean Code", author="Martin", user_id=user_id))
+    await session.commit()
+
+    for user_id, expected in ((1, [1, 3]), (12, [2]), (2, [])):
+        statement = select(book_fts.c.rowid).where(search_index.match(user_id, title="clean"))
+        assert sorted((await session.exec(statement)).all()) == expected
+
+    statement = select(book_fts.c.rowid).where(search_index.match_all(["martin"], 12))
+    assert (await session.exec(statement)).all() == [2]
+
+
+def test_should_fall_back_to_ilike_without_search_index(client, auth_headers, monkeypatch):
+    assert search_index.available
+
+    client.post(
+        "/books/",
+        json={"title": "Clean Code", "author": "Robert C. Martin", "status": "TO_READ"},
+        headers=auth_headers,
+    )
+
+    monkeypatch.setattr(search_index, "available", False)
+
+    assert client.get("/books/?title=clean", headers=auth_headers).json()["total"] == 1
+    assert client.get("/books/search?q=martin", headers=auth_headers).json()["total"] == 1
+
+
+def test_should_bulk_create_books_from_json_array(client, auth_headers):
+    response = client.post(
+        "/books/bulk",
+        json=[
+            {"title": "Clean Code", "author": "Robert C. Martin", "status": "TO_READ"},
+            {"title": "Missing author"},
+            {"title": "Refactoring", "author": "Martin Fowler", "status": "DONE"},
+        ],
+        headers=auth_headers,
+    )
+
+    assert response.status_code == HTTPStatus.OK
+
+    data = response.json()
+
+    assert data["created"] == 2
+    assert data["failed"] == 1
+    assert [item["index"] for item in data["items"]] == [0, 1, 2]
+    assert data["items"][1]["id"] is None
+    assert data["items"][1]["errors"][0]["loc"] == ["author"]
+
+    book = client.get(f"/books/{data['items'][2]['id']}", headers=auth_headers).json()
+
+    assert book["title"] == "Refactoring"
+    assert client.get("/books/", headers=auth_headers).json()["total"] == 2
+
+
+def test_should_bulk_create_books_from_ndjson(client, auth_headers):
+    body = (
+        '{"title": "Book 1", "author": "Author"}\n'
+        "not json\n"
+        "\n"
+        '{"title": "Book 2", "author": "Author", "status": "READING"}'
+    )
+
+    response = client.post(
+        "/books/bulk",
+        content=body,
+        headers={**auth_headers, "Content-Type": "application/x-ndjson"},
+    )
+
+    data = response.json()
+
+    assert data["created"] == 2
+    assert data["items"][1]["errors"][0]["type"] == "json_invalid"
+    assert data["items"][2]["id"] is not None
+
+
+def test_should_reject_bulk_body_that_is_not_an_array(client, auth_headers):
+    response = client.post(
+        "/books/bulk", json={"title": "Book", "author": "Author"}, headers=auth_headers
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_should_reject_bulk_import_above_the_limit(client, auth_headers, monkeypatch):
+    monkeypatch.setattr("app.books.router.BOOK_BULK_MAX_ITEMS", 2)
+
+    response = client.post(
+        "/books/bulk",
+        json=[{"title": f"Book {i}", "author": "Author"} for i in range(3)],
+        headers=auth_headers,
+    )
+
+    assert response.status_code == HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+    assert client.get("/books/", headers=auth_headers).json()["total"] == 0
+
+
+def test_should_export_books_as_ndjson(client, auth_headers):
+    for title in ("B", "A", "C"):
+        client.post(
+            "/books/",
+            json={"title": title, "author": "Author", "status": "TO_READ"},
+            headers=auth_headers,
+        )
+    client.post(
+        "/books/",
+        json={"title": "D", "author": "Author", "status": "DONE"},
+        headers=auth_headers,
+    )
+
+    response = client.get(
+        "/books/export?status=TO_READ&order_by=title&order=asc", headers=auth_headers
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers["content-type"] == "application/x-ndjson"
+
+    books = [json.loads(line) for line in response.text.splitlines()]
+
+    assert [book["title"] for book in books] == ["A", "B", "C"]
+    assert set(books[0]) == {
+        "id",
+        "title",
+        "author",
+        "status",
+        "start_date",
+        "end_date",
+        "created_at",
+    }
+
+
+def test_should_export_books_as_csv(client, auth_headers, monkeypatch):
+    # lotes pequenos para exercitar vários pedaços da resposta
+    monkeypatch.setattr("app.books.service.BOOK_EXPORT_BATCH_SIZE", 2)
+
+    for i in range(5):
+        client.post(
+            "/books/",
+            json={
+                "title": f"Book {i}, vol. {i}",
+                "author": "Author",
+                "start_date": f"2024-01-0{i + 1}",
+            },
+            headers=auth_headers,
+        )
+
+    response = client.get(
+        "/books/export?format=csv&order_by=start_date&order=asc", headers=auth_headers
+    )
+
+    assert response.headers["content-type"] == "text/csv; charset=utf-8"
+
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+
+    assert [row["title"] for row in rows] == [f"Book {i}, vol. {i}" for i in range(5)]
+    assert rows[0]["start_date"] == "2024-01-01"
+    assert rows[0]["end_date"] == ""
+
+
+def test_should_export_only_csv_header_for_empty_library(client, auth_headers):
+    response = client.get("/books/export?format=csv", headers=auth_headers)
+
+    assert response.text.splitlines() == ["title,author,status,start_date,end_date,id,created_at"]
+
+
+def _create_books(client, auth_headers, books):
+    response = client.post("/books/bulk", json=books, headers=auth_headers)
+    return [item["id"] for item in response.json()["items"]]
+
+
+def test_should_bulk_update_books_by_id(client, auth_headers):
+    ids = _create_books(
+        client, auth_headers, [{"title": f"Book {i}", "author": "Author"} for i in range(3)]
+    )
+
+    response = client.patch(
+        "/books/bulk",
+        json={"ids": [*ids[:2], 9999], "patch": {"status": "DONE", "end_date": "2024-05-01"}},
+        headers=auth_headers,
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {"affected": 2}
+
+    books = client.get("/books/?order_by=title&order=asc", headers=auth_headers).json()["items"]
+
+    assert [book["status"] for book in books] == ["DONE", "DONE", "TO_READ"]
+    assert books[0]["end_date"] == "2024-05-01"
+
+
+def test_should_bulk_update_books_by_filters(client, auth_headers):
+    _create_books(
+        client,
+        auth_headers,
+        [
+            {"title": "Clean Code", "author": "Robert C. Martin", "status": "READING"},
+            {"title": "Clean Architecture", "author": "Robert C. Martin", "status": "READING"},
+            {"title": "Refactoring", "author": "Martin Fowler", "status": "READING"},
+        ],
+    )
+
+    response = client.patch(
+        "/books/bulk",
+        json={"filters": {"title": "clean"}, "patch": {"status": "DONE"}},
+        headers=auth_headers,
+    )
+
+    assert response.json() == {"affected": 2}
+    assert client.get("/books/?status=DONE", headers=auth_headers).json()["total"] == 2
+
+
+def test_should_bulk_delete_books(client, auth_headers):
+    ids = _create_books(
+        client,
+        auth_headers,
+        [{"title": f"Book {i}", "author": "Author", "status": "DONE"} for i in range(3)]
+        + [{"title": "Book 3", "author": "Author"}],
+    )
+    assert client.get("/books/", headers=auth_headers).json()["total"] == 4
+
+    response = client.request("DELETE", "/books/bulk", json={"ids": ids[:1]}, headers=auth_headers)
+    assert response.json() == {"affected": 1}
+
+    response = client.request(
+        "DELETE", "/books/bulk", json={"filters": {"status": "DONE"}}, headers=auth_headers
+    )
+    assert response.json() == {"affected": 2}
+
+    data = client.get("/books/", headers=auth_headers).json()
+
+    assert data["total"] == 1
+    assert [book["id"] for book in data["items"]] == [ids[3]]
+
+
+def test_bulk_writes_should_not_touch_other_users_books(client, auth_headers):
+    ids = _create_books(client, auth_headers, [{"title": "Mine", "author": "Author"}])
+
+    client.post("/users/", json={"email": "other@example.com", "password": "12345678"})
+    token = client.post(
+        "/users/token", data={"username": "other@example.com", "password": "12345678"}
+    ).json()["access_token"]
+    other_headers = {"Authorization": f"Bearer {token}"}
+
+    response = client.patch(
+        "/books/bulk", json={"ids": ids, "patch": {"title": "Stolen"}}, headers=other_headers
+    )
+    assert response.json() == {"affected": 0}
+
+    response = client.request("DELETE", "/books/bulk", json={"ids": ids}, headers=other_headers)
+    assert response.json() == {"affected": 0}
+
+    assert client.get(f"/books/{ids[0]}", headers=auth_headers).json()["title"] == "Mine"
+
+
+def test_should_reject_bulk_write_without_a_selection(client, auth_headers):
+    for body in (
+        {"patch": {"status": "DONE"}},
+        {"ids": [1], "filters": {"status": "DONE"}, "patch": {"status": "DONE"}},
+        {"filters": {}, "patch": {"status": "DONE"}},
+        {"ids": [1], "patch": {}},
+    ):
+        response = client.patch("/books/bulk", json=body, headers=auth_headers)
+
+        assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY, body
+
+
+def test_should_reject_bulk_patch_that_nulls_a_required_field(client, auth_headers):
+    book_id = client.post(
+        "/books/", json={"title": "Book", "author": "Author"}, headers=auth_headers
+    ).json()["id"]
+
+    for name in ("title", "author", "status"):
+        body = {"ids": [book_id], "patch": {name: None}}
+        response = client.patch("/books/bulk", json=body, headers=auth_headers)
+
+        assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY, name
+
+    # as datas continuam anuláveis
+    body = {"ids": [book_id], "patch": {"start_date": "2024-01-01", "end_date": None}}
+    response = client.patch("/books/bulk", json=body, headers=auth_headers)
+
+    assert response.json() == {"affected": 1}
+    assert client.get(f"/books/{book_id}", headers=auth_headers).json()["title"] == "Book"
+
+
+def test_should_return_304_for_unchanged_book_list(client, auth_headers, async_engine):
+    client.post("/books/", json={"title": "Book", "author": "Author"}, headers=auth_headers)
+
+    response = client.get("/books/?size=5", headers=auth_headers)
+    etag = response.headers["etag"]
+
+    assert etag.startswith('W/"')
+
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        response = client.get("/books/?size=5", headers={**auth_headers, "If-None-Match": etag})
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response.headers["etag"] == etag
+    # só a leitura da versão da biblioteca, sem listagem nem contagem
+    assert len(statements) == 1
+    assert "library_version" in statements[0]
+
+    # outros parâmetros, outro ETag
+    assert client.get("/books/?size=6", headers=auth_headers).headers["etag"] != etag
+
+
+def test_book_list_etag_should_change_after_any_write(client, auth_headers):
+    book_id = client.post(
+        "/books/", json={"title": "Book", "author": "Author"}, headers=auth_headers
+    ).json()["id"]
+
+    etags = [client.get("/books/", headers=auth_headers).headers["etag"]]
+
+    for method, url, body in (
+        ("PUT", f"/books/{book_id}", {"status": "DONE"}),
+        ("PATCH", "/books/bulk", {"ids": [book_id], "patch": {"status": "READING"}}),
+        ("POST", "/books/", {"title": "Other", "author": "Author"}),
+        ("DELETE", f"/books/{book_id}", None),
+    ):
+        client.request(method, url, json=body, headers=auth_headers)
+        etag = client.get("/books/", headers=auth_headers).headers["etag"]
+
+        assert etag not in etags, method
+        etags.append(etag)
+
+    response = client.get("/books/", headers={**auth_headers, "If-None-Match": etags[-1]})
+
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
+def test_should_return_304_for_unchanged_book(client, auth_headers):
+    first_id, second_id = _create_books(
+        client,
+        auth_headers,
+        [{"title": "First", "author": "Author"}, {"title": "Second", "author": "Author"}],
+    )
+
+    etag = client.get(f"/books/{first_id}", headers=auth_headers).headers["etag"]
+    headers = {**auth_headers, "If-None-Match": etag}
+
+    # escrever em outro livro não invalida este
+    client.put(f"/books/{second_id}", json={"status": "DONE"}, headers=auth_headers)
+
+    assert client.get(f"/books/{first_id}", headers=headers).status_code == HTTPStatus.NOT_MODIFIED
+
+    client.put(f"/books/{first_id}", json={"status": "DONE"}, headers=auth_headers)
+    response = client.get(f"/books/{first_id}", headers=headers)
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers["etag"] != etag
+    assert response.json()["status"] == "DONE"
+
+
+def test_book_etag_should_change_when_a_deleted_id_is_reused(client, auth_headers):
+    book_id = client.post(
+        "/books/", json={"title": "Deleted", "author": "Author"}, headers=auth_headers
+    ).json()["id"]
+    etag = client.get(f"/books/{book_id}", headers=auth_headers).headers["etag"]
+
+    client.delete(f"/books/{book_id}", headers=auth_headers)
+    # sem AUTOINCREMENT o SQLite devolve o mesmo id ao próximo livro
+    reused = client.post(
+        "/books/", json={"title": "Reused", "author": "Author"}, headers=auth_headers
+    ).json()
+    assert reused["id"] == book_id
+
+    response = client.get(f"/books/{book_id}", headers={**auth_headers, "If-None-Match": etag})
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()["title"] == "Reused"
+
+
+def test_should_serve_repeated_reads_from_cache_until_a_write(client, auth_headers, async_engine):
+    book_id = client.post(
+        "/books/", json={"title": "Book", "author": "Author"}, headers=auth_headers
+    ).json()["id"]
+
+    client.get("/books/?title=BOOK", headers=auth_headers)
+    client.get(f"/books/{book_id}", headers=auth_headers)
+
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        # mesmo filtro com outra caixa cai na mesma entrada
+        listed = client.get("/books/?title=book", headers=auth_headers).json()
+        detail = client.get(f"/books/{book_id}", headers=auth_headers).json()
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+    # apenas a versão da biblioteca para o ETag da listagem
+    assert len(statements) == 1
+    assert listed["total"] == 1
+    assert detail["title"] == "Book"
+
+    client.put(f"/books/{book_id}", json={"title": "Renamed"}, headers=auth_headers)
+
+    assert client.get("/books/?title=book", headers=auth_headers).json()["total"] == 0
+    assert client.get(f"/books/{book_id}", headers=auth_headers).json()["title"] == "Renamed"
+
+
+def test_should_list_changes_since_a_cursor(client, auth_headers):
+    ids = _create_books(
+        client, auth_headers, [{"title": f"Book {i}", "author": "Author"} for i in range(3)]
+    )
+
+    initial = client.get("/books/changes", headers=auth_headers).json()
+    assert [book["id"] for book in initial["books"]] == ids
+    assert initial["deleted"] == []
+    assert initial["has_more"] is False
+
+    client.put(f"/books/{ids[0]}", json={"status": "DONE"}, headers=auth_headers)
+    client.delete(f"/books/{ids[1]}", headers=auth_headers)
+    created = client.post(
+        "/books/", json={"title": "New", "author": "Author"}, headers=auth_headers
+    ).json()["id"]
+
+    response = client.get(
+        "/books/changes", params={"since": initial["next_cursor"]}, headers=auth_headers
+    )
+    changes = response.json()
+
+    assert response.status_code == 200
+    assert [book["id"] for book in changes["books"]] == [ids[0], created]
+    assert changes["books"][0]["status"] == "DONE"
+    assert [deleted["id"] for deleted in changes["deleted"]] == [ids[1]]
+
+    # nada novo: o cursor não muda
+    unchanged = client.get(
+        "/books/changes", params={"since": changes["next_cursor"]}, headers=auth_headers
+    ).json()
+    assert unchanged == {
+        "books": [],
+        "deleted": [],
+        "next_cursor": changes["next_cursor"],
+        "has_more": False,
+    }
+
+
+def test_should_page_through_changes(client, auth_headers):
+    ids = _create_books(
+        client, auth_headers, [{"title": f"Book {i}", "author": "Author"} for i in range(5)]
+    )
+    client.request("DELETE", "/books/bulk", json={"ids": ids[:2]}, headers=auth_headers)
+    client.patch(
+        "/books/bulk", json={"ids": ids[2:4], "patch": {"status": "READING"}}, headers=auth_headers
+    )
+
+    seen_books, seen_deleted, since, pages = [], [], None, 0
+    while True:
+        params = {"size": 2} | ({"since": since} if since else {})
+        page = client.get("/books/changes", params=params, headers=auth_headers).json()
+        seen_books += [book["id"] for book in page["books"]]
+        seen_deleted += [deleted["id"] for deleted in page["deleted"]]
+        since, pages = page["next_cursor"], pages + 1
+        if not page["has_more"]:
+            break
+
+    # ordem da última escrita: o não alterado, as lápides, depois os alterados
+    assert seen_books == [ids[4], ids[2], ids[3]]
+    assert sorted(seen_deleted) == ids[:2]
+    assert pages == 3
+
+
+def test_changes_should_only_include_own_books(client, auth_headers):
+    _create_books(client, auth_headers, [{"title": "Mine", "author": "Author"}])
+
+    client.post("/users/", json={"email": "other@example.com", "password": "12345678"})
+    token = client.post(
+        "/users/token", data={"username": "other@example.com", "password": "12345678"}
+    ).json()["access_token"]
+
+    changes = client.get("/books/changes", headers={"Authorization": f"Bearer {token}"}).json()
+
+    assert changes["books"] == []
+
+
+def test_should_reject_invalid_changes_cursor(client, auth_headers):
+    response = client.get("/books/changes?since=not-a-cursor", headers=auth_headers)
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+def test_book_responses_should_expose_book_read_fields_in_order(client, auth_headers):
+    created = client.post(
+        "/books/", json={"title": "Book", "author": "Author"}, headers=auth_headers
+    ).json()
+    book_id = created["id"]
+    updated = client.put(f"/books/{book_id}", json={"status": "DONE"}, headers=auth_headers)
+
+    responses = [
+        created,
+        updated.json(),
+        client.get(f"/books/{book_id}", headers=auth_headers).json(),
+        # segunda leitura: vem do cache
+        client.get(f"/books/{book_id}", headers=auth_headers).json(),
+        client.get("/books/", headers=auth_headers).json()["items"][0],
+        client.get("/books/?pagination=cursor", headers=auth_headers).json()["items"][0],
+        client.get("/books/search?q=Book", headers=auth_headers).json()["items"][0],
+    ]
+
+    # mesmas chaves e na mesma ordem em todas as rotas
+    for book in responses:
+        assert list(book) == list(BookRead.model_fields)
+    assert [book["status"] for book in responses[1:]] == ["DONE"] * 6
+
+
+def test_should_return_only_requested_fields(client, auth_headers, async_engine):
+    book_id = client.post(
+        "/books/", json={"title": "Book", "author": "Author"}, headers=auth_headers
+    ).json()["id"]
+    client.get(f"/books/{book_id}", headers=auth_headers)
+
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        # ordem e repetição em `fields` não importam
+        listed = client.get("/books/?fields=status,title,status", headers=auth_headers).json()
+        detail = client.get(f"/books/{book_id}?fields=title", headers=auth_headers).json()
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+    assert listed["items"] == [{"title": "Book", "status": "TO_READ"}]
+    assert listed["total"] == 1
+    # a leitura completa anterior está no cache, mas com outra chave
+    assert detail == {"title": "Book"}
+
+    selects = [statement for statement in statements if "FROM book" in statement]
+    assert selects
+    assert all("book.author" not in statement for statement in selects)
+
+    cursor_page = client.get("/books/?pagination=cursor&fields=id", headers=auth_headers).json()
+    assert cursor_page["items"] == [{"id": book_id}]
+    assert set(client.get(f"/books/{book_id}", headers=auth_headers).json()) == set(
+        BookRead.model_fields
+    )
+
+
+def test_should_export_only_requested_fields(client, auth_headers):
+    client.post("/books/", json={"title": "Book", "author": "Author"}, headers=auth_headers)
+
+    ndjson = client.get("/books/export?fields=title,author", headers=auth_headers)
+    csv_export = client.get("/books/export?format=csv&fields=title,status", headers=auth_headers)
+
+    assert [json.loads(line) for line in ndjson.text.splitlines()] == [
+        {"title": "Book", "author": "Author"}
+    ]
+    assert csv_export.text.splitlines() == ["title,status", "Book,TO_READ"]
+
+
+def test_should_reject_unknown_fields(client, auth_headers):
+    for fields in ("title,user_id", "title,,author", ""):
+        response = client.get(f"/books/?fields={fields}", headers=auth_headers)
+
+        assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+    assert client.get("/books/1?fields=version", headers=auth_headers).status_code == 422
+    assert client.get("/books/export?fields=secret", headers=auth_headers).status_code == 422
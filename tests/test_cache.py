@@ -0,0 +1,221 @@
+import asyncio
+import json
+import time
+
+import pytest
+from sqlalchemy import event
+
+from app.books.model import Book, BookCreate, BookFilters
+from app.books.service import BookService
+from app.core.exceptions import NotFoundException
+from app.core.read_cache import MemoryReadCache, NullReadCache, SQLiteReadCache
+from app.core.singleflight import SingleFlight
+from app.users.model import User
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def read_cache(request, tmp_path):
+    if request.param == "memory":
+        yield MemoryReadCache(maxsize=3, ttl=60)
+        return
+
+    cache = SQLiteReadCache(str(tmp_path / "cache.db"), maxsize=3, ttl=60)
+    yield cache
+    cache.close()
+
+
+def test_read_cache_should_store_and_invalidate_per_user(read_cache):
+    value, generation = read_cache.get(1, "page")
+    assert value is None
+
+    read_cache.set(1, "page", b"one", generation)
+    read_cache.set(2, "page", b"two", read_cache.get(2, "page")[1])
+
+    assert read_cache.get(1, "page")[0] == b"one"
+
+    read_cache.invalidate(1)
+
+    assert read_cache.get(1, "page")[0] is None
+    assert read_cache.get(2, "page")[0] == b"two"
+
+    stats = read_cache.stats()
+
+    assert stats["hits"] == 2
+    assert stats["misses"] == 3
+    assert stats["bytes"] >= len(b"two")
+
+
+def test_read_cache_should_drop_value_read_before_an_invalidation(read_cache):
+    _, generation = read_cache.get(1, "page")
+
+    # escrita concluída enquanto a leitura ainda buscava no banco
+    read_cache.invalidate(1)
+    read_cache.set(1, "page", b"stale", generation)
+
+    assert read_cache.get(1, "page")[0] is None
+
+
+def test_read_cache_should_respect_size_limit(read_cache):
+    for i in range(5):
+        read_cache.set(1, f"page-{i}", b"x", 0)
+
+    assert read_cache.stats()["size"] <= 3
+    assert read_cache.get(1, "page-4")[0] == b"x"
+
+
+def test_sqlite_read_cache_should_be_shared_between_instances(tmp_path):
+    path = str(tmp_path / "cache.db")
+    first = SQLiteReadCache(path, maxsize=10, ttl=60)
+    second = SQLiteReadCache(path, maxsize=10, ttl=60)
+
+    first.set(1, "page", b"value", 0)
+    assert second.get(1, "page")[0] == b"value"
+
+    second.invalidate(1)
+    assert first.get(1, "page")[0] is None
+
+    first.close()
+    second.close()
+
+
+def test_sqlite_read_cache_should_expire_entries(tmp_path):
+    cache = SQLiteReadCache(str(tmp_path / "cache.db"), maxsize=10, ttl=0.05)
+
+    cache.set(1, "page", b"value", 0)
+    time.sleep(0.1)
+
+    assert cache.get(1, "page")[0] is None
+    cache.close()
+
+
+@pytest.mark.anyio
+async def test_single_flight_should_share_one_execution():
+    flights = SingleFlight()
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    results = await asyncio.gather(*(flights.do(1, "page", load) for _ in range(5)))
+
+    assert results == [1] * 5
+    assert flights.stats() == {"executions": 1, "coalesced": 4, "in_flight": 0}
+
+    # terminada a execução, a próxima chamada roda de novo
+    assert await flights.do(1, "page", load) == 2
+
+
+@pytest.mark.anyio
+async def test_single_flight_should_share_exceptions():
+    flights = SingleFlight()
+
+    async def load():
+        await asyncio.sleep(0.01)
+        raise NotFoundException("Book not found")
+
+    results = await asyncio.gather(
+        *(flights.do(1, "book", load) for _ in range(3)), return_exceptions=True
+    )
+
+    assert all(isinstance(result, NotFoundException) for result in results)
+    assert flights.executions == 1
+
+
+@pytest.mark.anyio
+async def test_single_flight_should_not_join_calls_started_before_forget():
+    flights = SingleFlight()
+    release = asyncio.Event()
+
+    async def stale():
+        await release.wait()
+        return "before write"
+
+    async def fresh():
+        return "after write"
+
+    leader = asyncio.create_task(flights.do(1, "page", stale))
+    await asyncio.sleep(0)
+
+    flights.forget(1)
+
+    assert await flights.do(1, "page", fresh) == "after write"
+
+    release.set()
+    assert await leader == "before write"
+
+
+@pytest.mark.anyio
+async def test_single_flight_follower_should_retry_when_leader_is_cancelled():
+    flights = SingleFlight()
+
+    async def slow():
+        await asyncio.sleep(10)
+
+    async def fast():
+        return "done"
+
+    leader = asyncio.create_task(flights.do(1, "page", slow))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flights.do(1, "page", fast))
+    await asyncio.sleep(0)
+
+    leader.cancel()
+
+    assert await follower == "done"
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+
+
+@pytest.mark.anyio
+async def test_concurrent_identical_reads_should_query_once(session):
+    service = BookService(cache=NullReadCache(), flights=SingleFlight())
+    user = User(id=1, email="reader@example.com", hashed_password="x")
+    session.add(Book(title="Book", author="Author", user_id=1))
+    await session.commit()
+
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    engine = session.bind.sync_engine
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        pages = await asyncio.gather(
+            *(service.list_books_paginated(session, 1, 10, BookFilters(), user) for _ in range(3))
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert len(statements) == 1
+    assert [json.loads(page)["total"] for page in pages] == [1, 1, 1]
+    assert service.flights.coalesced == 2
+
+
+@pytest.mark.anyio
+async def test_page_cache_should_miss_after_a_write_from_another_worker(session):
+    # Cada worker tem o próprio cache em memória; só o banco é compartilhado
+    worker_a = BookService(cache=MemoryReadCache(maxsize=10, ttl=60), flights=SingleFlight())
+    worker_b = BookService(cache=MemoryReadCache(maxsize=10, ttl=60), flights=SingleFlight())
+    user = User(id=1, email="reader@example.com", hashed_password="x")
+    session.add(Book(title="Book", author="Author", user_id=1))
+    await session.commit()
+
+    async def list_page(service: BookService) -> dict:
+        version = await service.library_version(session, user)
+        page = await service.list_books_paginated(
+            session, 1, 10, BookFilters(), user, library_version=version
+        )
+        return json.loads(page)
+
+    assert (await list_page(worker_a))["total"] == 1
+
+    await worker_b.create_book(session, BookCreate(title="Other", author="Author"), user)
+
+    listed = await list_page(worker_a)
+
+    assert listed["total"] == 2
+    assert {book["title"] for book in listed["items"]} == {"Book", "Other"}
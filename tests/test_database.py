@@ -0,0 +1,289 @@
+import asyncio
+from itertools import product
+
+import pytest
+from sqlalchemy import event, inspect, text
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.books.model import SORT_COLUMNS, Book, BookCursor, BookFilters, BookRead, ChangeCursor
+from app.books.repository import BookRepository
+from app.core.database import (
+    apply_sqlite_pragmas,
+    read_only_database_url,
+    recent_writers,
+    sqlite_pragmas,
+)
+from app.core.migrations import MIGRATIONS, current_version, run_migrations
+from app.core.write_coalescer import WriteCoalescer
+
+repository = BookRepository()
+
+
+async def _executed_statements(session: AsyncSession, call) -> list[tuple[str, tuple]]:
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    engine = session.bind.sync_engine
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        await call()
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    return statements
+
+
+async def _query_plan(session: AsyncSession, statement: str, parameters) -> str:
+    connection = await session.connection()
+    rows = await connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+    return "\n".join(row.detail for row in rows)
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    ("order_by", "order", "status"),
+    list(product(SORT_COLUMNS, ("asc", "desc"), (None, "DONE"))),
+)
+async def test_book_listing_should_not_sort_in_temp_btree(session, order_by, order, status):
+    filters = BookFilters(order_by=order_by, order=order, status=status)
+    cursor = BookCursor(order_by=order_by, order=order, value="x", id=1)
+
+    async def list_books():
+        await repository.list_paginated(session, page=1, size=10, filters=filters, user_id=1)
+        await repository.list_paginated(
+            session, page=3, size=10, filters=filters, user_id=1, include_total=False
+        )
+        await repository.list_keyset(session, size=10, filters=filters, user_id=1, after=cursor)
+        async for _ in repository.stream(session, filters=filters, user_id=1, batch_size=10):
+            pass
+        await repository.changes(session, user_id=1, after=ChangeCursor(seq=3, id=1), size=10)
+
+    for statement, parameters in await _executed_statements(session, list_books):
+        plan = await _query_plan(session, statement, parameters)
+
+        assert "USE TEMP B-TREE" not in plan, f"{statement}\n{plan}"
+
+
+@pytest.mark.anyio
+async def test_book_writes_should_take_a_single_statement(session):
+    book = Book(title="Clean Code", author="Robert C. Martin", user_id=1)
+
+    statements = await _executed_statements(session, lambda: repository.create(session, book))
+
+    assert len(statements) == 1
+    assert book.id is not None
+    assert book.created_at is not None
+
+    async def update():
+        updated = await repository.update(session, book.id, user_id=1, values={"status": "DONE"})
+        assert updated.status == "DONE"
+        assert updated.title == "Clean Code"
+
+    assert len(await _executed_statements(session, update)) == 1
+
+    async def delete():
+        assert await repository.delete(session, book.id, user_id=2) is False
+        assert await repository.delete(session, book.id, user_id=1) is True
+
+    # delete grava a lápide (GET /books/changes) e apaga: dois comandos cada
+    assert len(await _executed_statements(session, delete)) == 4
+    assert await repository.update(session, book.id, user_id=1, values={"title": "x"}) is None
+
+
+@pytest.mark.anyio
+async def test_projected_reads_should_not_load_orm_entities(session):
+    book = await repository.create(session, Book(title="SICP", author="Abelson", user_id=1))
+    session.expunge_all()
+
+    items, total, _ = await repository.list_paginated(
+        session, page=1, size=10, filters=BookFilters(), user_id=1
+    )
+    row = await repository.get_row(session, book.id, user_id=1)
+
+    assert total == 1
+    assert tuple(items[0]) == tuple(getattr(book, name) for name in BookRead.model_fields)
+    assert tuple(row) == (*items[0], 1)
+    assert len(session.identity_map) == 0
+    assert await repository.get_row(session, book.id, user_id=2) is None
+
+
+def _coalescer(async_engine, **options) -> WriteCoalescer:
+    options = {"window": 0.01, "max_batch": 64, **options}
+    return WriteCoalescer(lambda: AsyncSession(async_engine, expire_on_commit=False), **options)
+
+
+@pytest.mark.anyio
+async def test_coalesced_writes_should_share_one_commit(session, async_engine):
+    writes = _coalescer(async_engine)
+    grouped = BookRepository(writes)
+    commits = []
+
+    def record(connection):
+        commits.append(connection)
+
+    event.listen(async_engine.sync_engine, "commit", record)
+
+    books = await asyncio.gather(
+        *(
+            grouped.create(session, Book(title=f"Book {i}", author="A", user_id=1))
+            for i in range(10)
+        )
+    )
+    event.remove(async_engine.sync_engine, "commit", record)
+
+    assert len(commits) == 1
+    assert writes.stats()["batches"] == 1
+    assert len({book.id for book in books}) == 10
+    assert all(book.created_at is not None for book in books)
+
+    updated = await asyncio.gather(
+        grouped.update(session, books[0].id, user_id=1, values={"status": "DONE"}),
+        grouped.update(session, books[1].id, user_id=2, values={"status": "DONE"}),
+    )
+    assert updated[0].status == "DONE"
+    assert updated[0].version == 2
+    assert updated[1] is None
+
+
+@pytest.mark.anyio
+async def test_coalesced_write_failure_should_only_fail_its_own_request(session, async_engine):
+    writes = _coalescer(async_engine, max_batch=3)
+    grouped = BookRepository(writes)
+
+    results = await asyncio.gather(
+        grouped.create(session, Book(title="Before", author="A", user_id=1)),
+        grouped.create(session, Book(title=None, author="A", user_id=1)),
+        grouped.create(session, Book(title="After", author="A", user_id=1)),
+        return_exceptions=True,
+    )
+
+    assert isinstance(results[1], IntegrityError)
+    assert writes.stats() == {"batches": 1, "writes": 3, "mean_batch_size": 3.0, "pending": 0}
+
+    titles = (await session.exec(text("SELECT title FROM book ORDER BY id"))).scalars().all()
+    assert titles == ["Before", "After"]
+
+
+def test_migrations_should_add_indexes_to_existing_database(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+
+    # esquema anterior aos índices compostos
+    with engine.begin() as connection:
+        connection.exec_driver_sql(
+            """
+            CREATE TABLE book (
+                title VARCHAR NOT NULL,
+                author VARCHAR NOT NULL,
+                status VARCHAR(7) NOT NULL,
+                start_date DATE,
+                end_date DATE,
+                id INTEGER NOT NULL PRIMARY KEY,
+                user_id INTEGER NOT NULL,
+                created_at DATETIME DEFAULT (CURRENT_TIMESTAMP) NOT NULL
+            )
+            """
+        )
+        connection.exec_driver_sql("CREATE INDEX ix_book_user_id ON book (user_id)")
+
+    with engine.begin() as connection:
+        assert run_migrations(connection) == len(MIGRATIONS)
+
+    with engine.begin() as connection:
+        assert current_version(connection) == len(MIGRATIONS)
+        # segunda execução não faz nada
+        assert run_migrations(connection) == len(MIGRATIONS)
+
+    existing = {index["name"] for index in inspect(engine).get_indexes("book")}
+    expected = {index.name for index in Book.__table__.indexes}
+
+    assert expected <= existing
+    columns = {column["name"] for column in inspect(engine).get_columns("book")}
+    assert {"version", "change_seq"} <= columns
+
+
+def _engines_used(engines: dict, call) -> list[str]:
+    used = []
+
+    def recorder(name):
+        def record(*args):
+            used.append(name)
+
+        return record
+
+    listeners = {name: recorder(name) for name in engines}
+    for name, engine in engines.items():
+        event.listen(engine.sync_engine, "before_cursor_execute", listeners[name])
+    try:
+        call()
+    finally:
+        for name, engine in engines.items():
+            event.remove(engine.sync_engine, "before_cursor_execute", listeners[name])
+
+    return used
+
+
+def test_reads_should_use_read_engine_except_right_after_a_write(
+    client, auth_headers, async_engine, read_engine
+):
+    engines = {"write": async_engine, "read": read_engine}
+    # o cadastro do usuário também conta como escrita
+    recent_writers.clear()
+
+    used = _engines_used(engines, lambda: client.get("/books/", headers=auth_headers))
+    assert set(used) == {"read"}
+
+    client.post("/books/", json={"title": "Book", "author": "Author"}, headers=auth_headers)
+
+    listed = []
+    used = _engines_used(
+        engines, lambda: listed.append(client.get("/books/", headers=auth_headers).json())
+    )
+    assert set(used) == {"write"}
+    assert listed[0]["total"] == 1
+
+
+@pytest.mark.anyio
+async def test_read_engine_should_reject_writes(read_engine):
+    async with read_engine.connect() as connection:
+        with pytest.raises(OperationalError, match="readonly"):
+            await connection.execute(text("DELETE FROM book"))
+
+
+@pytest.mark.anyio
+async def test_production_profile_should_apply_pragmas_on_connect(tmp_path, monkeypatch):
+    monkeypatch.setenv("SQLITE_CACHE_SIZE", "-1024")
+    pragmas = sqlite_pragmas("production")
+    url = f"sqlite+aiosqlite:///{tmp_path / 'tuned.db'}"
+
+    engine = create_async_engine(url)
+    apply_sqlite_pragmas(engine.sync_engine, pragmas)
+    read_engine = create_async_engine(read_only_database_url(url))
+    apply_sqlite_pragmas(read_engine.sync_engine, pragmas, read_only=True)
+
+    async with engine.begin() as connection:
+        await connection.exec_driver_sql("CREATE TABLE t (id INTEGER PRIMARY KEY)")
+
+        assert (await connection.exec_driver_sql("PRAGMA journal_mode")).scalar() == "wal"
+        assert (await connection.exec_driver_sql("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert (await connection.exec_driver_sql("PRAGMA cache_size")).scalar() == -1024
+        assert (await connection.exec_driver_sql("PRAGMA busy_timeout")).scalar() == 5000
+
+    # leitor somente leitura sobre o arquivo já em WAL
+    async with read_engine.connect() as connection:
+        assert (await connection.exec_driver_sql("PRAGMA journal_mode")).scalar() == "wal"
+        assert (await connection.exec_driver_sql("SELECT count(*) FROM t")).scalar() == 0
+
+    await engine.dispose()
+    await read_engine.dispose()
+
+
+def test_default_profile_should_keep_sqlite_defaults():
+    assert sqlite_pragmas("default") == {}
+
+    with pytest.raises(ValueError):
+        sqlite_pragmas("unknown")
@@ -0,0 +1,221 @@
+import asyncio
+import logging
+import pstats
+import re
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core import profiling, query_stats
+from app.core.metrics import Histogram, TimedQueuePool, pool_wait
+from app.core.query_stats import QueryStats, current_query_stats, instrument_engine
+
+
+def _sample(client, series: str) -> float:
+    for line in client.get("/metrics").text.splitlines():
+        if line.startswith(series + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+def test_metrics_should_count_requests_by_route_template(client, auth_headers):
+    book_id = client.post(
+        "/books/", json={"title": "Book", "author": "Author"}, headers=auth_headers
+    ).json()["id"]
+    ok = 'http_requests_total{method="GET",route="/books/{book_id}",status="200"}'
+    missing = 'http_requests_total{method="GET",route="/books/{book_id}",status="404"}'
+    before = _sample(client, ok), _sample(client, missing)
+
+    client.get(f"/books/{book_id}", headers=auth_headers)
+    client.get(f"/books/{book_id}", headers=auth_headers)
+    client.get("/books/999999", headers=auth_headers)
+
+    assert _sample(client, ok) == before[0] + 2
+    assert _sample(client, missing) == before[1] + 1
+
+    duration = 'http_request_duration_seconds_count{method="GET",route="/books/{book_id}"}'
+    assert _sample(client, duration) >= 3
+    assert _sample(client, 'http_requests_in_progress{method="GET"}') == 1  # o próprio /metrics
+
+
+def test_metrics_should_group_unknown_paths(client):
+    series = 'http_requests_total{method="GET",route="<unmatched>",status="404"}'
+    before = _sample(client, series)
+
+    client.get("/no/such/path/1")
+    client.get("/no/such/path/2")
+
+    assert _sample(client, series) == before + 2
+
+
+def test_metrics_should_export_cache_stats(client, auth_headers):
+    client.get("/books/", headers=auth_headers)
+
+    body = client.get("/metrics").text
+
+    assert client.get("/metrics").headers["content-type"].startswith("text/plain")
+    for name in ("book_read_cache_misses", "book_reads_executions", "token_cache_hits"):
+        assert f"\n{name} " in body
+
+
+def test_histogram_should_render_cumulative_buckets():
+    histogram = Histogram("latency_seconds", "help", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, "/x")
+
+    assert histogram.render()[2:] == [
+        'latency_seconds_bucket{route="/x",le="0.1"} 2',
+        'latency_seconds_bucket{route="/x",le="1.0"} 3',
+        'latency_seconds_bucket{route="/x",le="+Inf"} 4',
+        'latency_seconds_sum{route="/x"} 3.65',
+        'latency_seconds_count{route="/x"} 4',
+    ]
+
+
+@pytest.mark.anyio
+async def test_timed_pool_should_record_checkout_wait(tmp_path):
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        poolclass=TimedQueuePool,
+        pool_logging_name="metrics-test",
+    )
+
+    async with engine.connect():
+        pass
+
+    counts, _ = pool_wait.values[("metrics-test",)]
+    assert sum(counts) == 1
+    await engine.dispose()
+
+
+def test_should_report_request_queries_in_server_timing(
+    client, auth_headers, async_engine, read_engine, caplog
+):
+    instrument_engine(async_engine.sync_engine)
+    instrument_engine(read_engine.sync_engine)
+
+    with caplog.at_level(logging.INFO, logger="app.core.query_stats"):
+        response = client.get("/books/?title=x", headers=auth_headers)
+
+    timing = re.fullmatch(
+        r'db;dur=[\d.]+;desc="(\d+) queries", total;dur=[\d.]+',
+        response.headers["server-timing"],
+    )
+    # versão da biblioteca, contagem e página
+    assert int(timing[1]) >= 3
+    assert f"route=/books/ status=200 queries={timing[1]} " in caplog.text
+
+
+@pytest.mark.anyio
+async def test_query_stats_should_follow_each_task(async_engine):
+    instrument_engine(async_engine.sync_engine)
+
+    async def run(queries: int) -> QueryStats:
+        stats = QueryStats()
+        current_query_stats.set(stats)
+        async with AsyncSession(async_engine) as session:
+            for _ in range(queries):
+                await session.exec(text("SELECT 1"))
+                await asyncio.sleep(0)
+        return stats
+
+    # tasks intercaladas: cada greenlet do SQLAlchemy vê a contextvar da sua task
+    first, second = await asyncio.gather(run(3), run(5))
+
+    assert (first.count, second.count) == (3, 5)
+    assert first.statements == {"SELECT 1": 3}
+
+
+def test_query_stats_should_not_leak_state_when_a_statement_fails():
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    stats = QueryStats()
+    token = current_query_stats.set(stats)
+    try:
+        with engine.connect() as connection:
+            for _ in range(3):
+                with pytest.raises(OperationalError):
+                    connection.execute(text("SELECT * FROM missing"))
+            connection.execute(text("SELECT 1"))
+
+            assert not connection.info.get("query_started")
+    finally:
+        current_query_stats.reset(token)
+        engine.dispose()
+
+    # comandos que falharam não entram na conta
+    assert stats.count == 1
+    assert stats.statements == {"SELECT 1": 1}
+
+
+@pytest.mark.anyio
+async def test_should_log_plan_of_repeated_and_slow_statements(
+    session, async_engine, monkeypatch, caplog
+):
+    instrument_engine(async_engine.sync_engine)
+    monkeypatch.setattr(query_stats, "N_PLUS_ONE_THRESHOLD", 3)
+    monkeypatch.setattr(query_stats, "SLOW_QUERY_MS", 0)
+    current_query_stats.set(QueryStats())
+
+    with caplog.at_level(logging.WARNING, logger="app.core.query_stats"):
+        for book_id in range(4):
+            await session.exec(
+                text("SELECT title FROM book WHERE id = :id"), params={"id": book_id}
+            )
+
+    # avisa uma vez, ao atingir o limite
+    assert caplog.text.count("possible N+1 (3 runs in one request)") == 1
+    assert "SEARCH book USING INTEGER PRIMARY KEY" in caplog.text
+
+    caplog.clear()
+    monkeypatch.setattr(query_stats, "SLOW_QUERY_MS", 0.0001)
+    with caplog.at_level(logging.WARNING, logger="app.core.query_stats"):
+        await session.exec(text("SELECT count(*) FROM book"))
+
+    assert "slow query" in caplog.text
+    assert "SCAN book" in caplog.text
+
+
+@pytest.fixture(name="profile_dir")
+def profile_dir_fixture(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path / "profiles"))
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", "secret")
+    return tmp_path / "profiles"
+
+
+def test_should_profile_request_with_admin_token(client, auth_headers, profile_dir):
+    book_id = client.post(
+        "/books/", json={"title": "Book", "author": "Author"}, headers=auth_headers
+    ).json()["id"]
+
+    response = client.get(
+        f"/books/{book_id}", headers={**auth_headers, "X-Profile-Token": "secret"}
+    )
+
+    path = profile_dir / "GET-books-book_id" / response.headers["x-profile"]
+    functions = {name for _, _, name in pstats.Stats(str(path)).stats}
+    # dependências, serviço e serialização na mesma captura
+    assert {"get_current_user", "get_book", "row_json"} <= functions
+
+
+def test_should_not_profile_without_the_right_token(client, auth_headers, profile_dir):
+    response = client.get("/books/", headers={**auth_headers, "X-Profile-Token": "wrong"})
+
+    assert "x-profile" not in response.headers
+    assert not profile_dir.exists()
+
+
+def test_should_keep_profile_directory_bounded(client, auth_headers, profile_dir, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_MAX_FILES", 2)
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", "")
+    monkeypatch.setattr(profiling, "PROFILE_SAMPLE_RATE", 1.0)
+
+    for _ in range(3):
+        client.get("/books/", headers=auth_headers)
+    client.get("/health")
+
+    assert len(list(profile_dir.glob("*/*.pstats"))) == 2
+    assert (profile_dir / "GET-health").is_dir()